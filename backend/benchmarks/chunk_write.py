@@ -0,0 +1,92 @@
+"""
+Rows/sec of writing one file's chunks: the old per-object ORM path against
+the bulk writer's multi-row INSERT and binary COPY.
+
+    python -m benchmarks.chunk_write --rows 5000
+
+Every method writes into a throwaway File inside a transaction that is
+rolled back, so the benchmark leaves the database unchanged. The HNSW and
+GIN indexes on Chunk are maintained as in production.
+"""
+import argparse
+import asyncio
+import uuid
+
+import numpy as np
+from sqlmodel import select
+
+from src.admin.model import Admin
+from src.chunk.model import Chunk, EMBEDDING_DIMENSION
+from src.chunk.service import ChunkRow, ChunkWriter
+from src.file.model import File
+from benchmarks.common import Timer, make_session_maker, print_report
+
+METHODS = ["orm", "insert", "copy"]
+
+
+def make_rows(n: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    vectors = rng.normal(size=(n, EMBEDDING_DIMENSION)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    contents = [f"benchmark chunk {i} " + "lorem ipsum dolor sit amet " * 8 for i in range(n)]
+    return contents, vectors
+
+
+async def write_orm(session, file_id, contents, vectors):
+    # The per-chunk path the bulk writer replaced
+    for ordinal, (content, vector) in enumerate(zip(contents, vectors)):
+        session.add(Chunk(content=content, vector=vector.tolist(), file_id=file_id, ordinal=ordinal))
+    await session.flush()
+
+
+async def run(rows: int, batch_size: int):
+    contents, vectors = make_rows(rows)
+    engine, session_maker = make_session_maker()
+    report = {}
+    for method in METHODS:
+        async with session_maker() as session:
+            admin = (await session.exec(select(Admin.id).limit(1))).first()
+            if admin is None:
+                raise SystemExit("The benchmark needs at least one Admin row")
+            file = File(
+                name="benchmark.txt",
+                link=f"/tmp/benchmark-{uuid.uuid4()}.txt",
+                type=".txt",
+                media_type="text/plain",
+                hash=uuid.uuid4().hex,
+                uploaded_by=admin,
+            )
+            session.add(file)
+            await session.flush()
+
+            with Timer() as timer:
+                if method == "orm":
+                    await write_orm(session, file.id, contents, vectors)
+                else:
+                    writer = ChunkWriter(batch_size=batch_size, method=method)
+                    await writer.write(
+                        session,
+                        (
+                            ChunkRow(content=content, vector=vector, file_id=file.id, ordinal=ordinal)
+                            for ordinal, (content, vector) in enumerate(zip(contents, vectors))
+                        ),
+                    )
+            await session.rollback()
+        report[method] = {
+            "seconds": timer.ms / 1000,
+            "rows_per_sec": rows / (timer.ms / 1000),
+        }
+    await engine.dispose()
+
+    baseline = report["orm"]["rows_per_sec"]
+    for values in report.values():
+        values["speedup"] = values["rows_per_sec"] / baseline
+    print_report(f"{rows} chunks of dim {EMBEDDING_DIMENSION}, batch size {batch_size}", report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.batch_size))
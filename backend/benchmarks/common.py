@@ -0,0 +1,99 @@
+"""
+Shared helpers for the database benchmarks in this package.
+Run benchmarks from the backend directory, against a database that already
+holds a realistic corpus, e.g.:
+
+    python -m benchmarks.halfvec_search --queries 200
+"""
+import time
+from typing import Dict, List, Sequence
+
+import numpy as np
+from sqlalchemy import event, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel import create_engine, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.chunk.model import Chunk
+from src.config import Config
+from src.db.main import set_search_parameters
+
+
+def make_session_maker(database_url: str = None):
+    engine = AsyncEngine(create_engine(url=database_url or Config.DATABASE_URL))
+    # Same per-connection pgvector settings as the API engine
+    event.listen(engine.sync_engine, "connect", set_search_parameters)
+    session_maker = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+    return engine, session_maker
+
+
+async def sample_query_vectors(
+    session: AsyncSession, n: int, noise: float = 0.05, seed: int = 0
+) -> List[np.ndarray]:
+    """Stored chunk vectors plus a little noise, as stand-ins for real questions"""
+    result = await session.exec(select(Chunk.vector).order_by(func.random()).limit(n))
+    rng = np.random.default_rng(seed)
+    queries = []
+    for vector in result.all():
+        vector = np.asarray(vector, dtype=np.float32)
+        jitter = rng.normal(scale=noise * np.linalg.norm(vector) / np.sqrt(len(vector)), size=len(vector))
+        queries.append((vector + jitter).astype(np.float32))
+    return queries
+
+
+async def index_size(session: AsyncSession, index_name: str) -> int:
+    """Size of an index in bytes, 0 when it does not exist"""
+    result = await session.exec(
+        text("SELECT coalesce(pg_relation_size(to_regclass(:name)), 0) AS size").bindparams(
+            name=index_name
+        )
+    )
+    return result.first().size
+
+
+async def show_setting(session_maker, name: str) -> str:
+    """
+    Value of a server setting as a pooled connection sees it: the connection
+    is used once and returned to the pool (which rolls it back) before the
+    setting is read on the next checkout.
+    """
+    async with session_maker() as session:
+        await session.exec(text("SELECT 1"))
+    async with session_maker() as session:
+        result = await session.exec(text(f"SHOW {name}"))
+        return result.first()[0]
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.ms = (time.perf_counter() - self.start) * 1000
+
+
+def latency_summary(latencies_ms: Sequence[float]) -> Dict[str, float]:
+    values = np.asarray(latencies_ms)
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "mean_ms": float(values.mean()),
+    }
+
+
+def recall_at_k(found: Sequence, exact: Sequence) -> float:
+    if not exact:
+        return 1.0
+    return len(set(found) & set(exact)) / len(exact)
+
+
+def print_report(title: str, rows: Dict[str, dict]):
+    print(f"\n{title}")
+    for name, values in rows.items():
+        formatted = ", ".join(
+            f"{key}={value:.3f}" if isinstance(value, float) else f"{key}={value}"
+            for key, value in values.items()
+        )
+        print(f"  {name:<24} {formatted}")
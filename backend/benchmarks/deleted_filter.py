@@ -0,0 +1,103 @@
+"""
+Latency and result counts of filtered vector search (top-k and the tiered
+/ask search) with part of the corpus soft-deleted, with and without pgvector
+iterative index scans (pgvector >= 0.8).
+
+    python -m benchmarks.deleted_filter --deleted-fraction 0.3 --queries 200
+
+Files are marked deleted inside a transaction that is rolled back at the
+end, so the benchmark leaves the database unchanged.
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import func, text
+from sqlmodel import select, update
+
+from src.chunk.model import Chunk
+from src.config import Config
+from src.file.model import File
+from src.db.vector_search import VectorSearch
+from benchmarks.common import (
+    Timer,
+    latency_summary,
+    make_session_maker,
+    print_report,
+    sample_query_vectors,
+    show_setting,
+)
+
+SCAN_MODES = ["off", "relaxed_order"]
+
+
+async def mark_deleted(session, fraction: float) -> int:
+    """Soft-delete a random fraction of the live files, chunks included"""
+    live = await session.exec(select(File.id).where(File.deleted == False))
+    file_ids = live.all()
+    n = int(len(file_ids) * fraction)
+    result = await session.exec(
+        select(File.id).where(File.deleted == False).order_by(func.random()).limit(n)
+    )
+    deleted_ids = result.all()
+    if deleted_ids:
+        await session.exec(update(File).where(File.id.in_(deleted_ids)).values(deleted=True))
+        await session.exec(
+            update(Chunk).where(Chunk.file_id.in_(deleted_ids)).values(file_deleted=True)
+        )
+    return len(deleted_ids)
+
+
+async def run(queries: int, k: int, fraction: float):
+    engine, session_maker = make_session_maker()
+    # The connect hook's settings must survive the pool's reset-on-return
+    iterative_scan = await show_setting(session_maker, "hnsw.iterative_scan")
+    print(f"pooled connection: hnsw.iterative_scan = {iterative_scan} (configured {Config.HNSW_ITERATIVE_SCAN})")
+    if iterative_scan != Config.HNSW_ITERATIVE_SCAN:
+        raise SystemExit("hnsw.iterative_scan was not kept on the pooled connection")
+    async with session_maker() as session:
+        vectors = await sample_query_vectors(session, queries)
+        if not vectors:
+            raise SystemExit("The Chunk table is empty")
+        deleted_files = await mark_deleted(session, fraction)
+
+        report = {}
+        cases = [("unfiltered", True, "off")] + [
+            (f"filtered/{mode}", False, mode) for mode in SCAN_MODES
+        ]
+        for name, include_deleted, scan_mode in cases:
+            await session.exec(text(f"SET LOCAL hnsw.iterative_scan = {scan_mode}"))
+            search = VectorSearch(session, include_deleted=include_deleted)
+            latencies, counts, tiered_latencies, tiered_counts = [], [], [], []
+            for vector in vectors:
+                with Timer() as timer:
+                    chunks = await search.similarity_search_cosine(vector, limit=k)
+                latencies.append(timer.ms)
+                counts.append(len(chunks))
+                # The default /ask path
+                with Timer() as timer:
+                    hits = await search.similarity_search_tiered(vector)
+                tiered_latencies.append(timer.ms)
+                tiered_counts.append(len(hits))
+            report[name] = {
+                **latency_summary(latencies),
+                "mean_hits": sum(counts) / len(counts),
+                "short_results": sum(count < k for count in counts),
+            }
+            report[f"{name}/tiered"] = {
+                **latency_summary(tiered_latencies),
+                "mean_hits": sum(tiered_counts) / len(tiered_counts),
+            }
+        await session.rollback()
+    await engine.dispose()
+    print_report(
+        f"{len(vectors)} queries, k={k}, {deleted_files} files ({fraction:.0%}) deleted", report
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--deleted-fraction", type=float, default=0.3)
+    args = parser.parse_args()
+    asyncio.run(run(args.queries, args.k, args.deleted_fraction))
@@ -0,0 +1,73 @@
+"""
+Compare the float32 and halfvec HNSW indexes on Chunk.vector:
+index size, p50/p95 latency and recall@k against an exact (sequential) scan.
+
+    python -m benchmarks.halfvec_search --queries 200 --k 10
+"""
+import argparse
+import asyncio
+
+from sqlalchemy import text
+from sqlmodel import select
+
+from src.chunk.model import Chunk
+from src.db.vector_search import VectorSearch
+from benchmarks.common import (
+    Timer,
+    index_size,
+    latency_summary,
+    make_session_maker,
+    print_report,
+    recall_at_k,
+    sample_query_vectors,
+)
+
+INDEXES = {
+    "full": "idx_chunk_vector_cosine_hnsw",
+    "half": "idx_chunk_vector_halfvec_cosine_hnsw",
+}
+
+
+async def top_k_ids(session, precision: str, query_vector, k: int):
+    distance = VectorSearch(session, precision=precision, metric="cosine")._distance(query_vector)
+    result = await session.exec(select(Chunk.id).order_by(distance).limit(k))
+    return result.all()
+
+
+async def run(queries: int, k: int, ef_search: int):
+    engine, session_maker = make_session_maker()
+    async with session_maker() as session:
+        vectors = await sample_query_vectors(session, queries)
+        if not vectors:
+            raise SystemExit("The Chunk table is empty")
+        await session.exec(text(f"SET hnsw.ef_search = {int(ef_search)}"))
+
+        # Exact neighbours: full-precision distances without any index
+        await session.exec(text("SET enable_indexscan = off"))
+        exact = [await top_k_ids(session, "full", vector, k) for vector in vectors]
+        await session.exec(text("SET enable_indexscan = on"))
+
+        report = {}
+        for precision, index_name in INDEXES.items():
+            latencies, recalls = [], []
+            for vector, exact_ids in zip(vectors, exact):
+                with Timer() as timer:
+                    ids = await top_k_ids(session, precision, vector, k)
+                latencies.append(timer.ms)
+                recalls.append(recall_at_k(ids, exact_ids))
+            report[precision] = {
+                "index_mb": await index_size(session, index_name) / (1024 * 1024),
+                **latency_summary(latencies),
+                f"recall@{k}": sum(recalls) / len(recalls),
+            }
+    await engine.dispose()
+    print_report(f"{len(vectors)} queries, k={k}, ef_search={ef_search}", report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef-search", type=int, default=64)
+    args = parser.parse_args()
+    asyncio.run(run(args.queries, args.k, args.ef_search))
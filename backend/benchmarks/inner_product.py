@@ -0,0 +1,87 @@
+"""
+Compare cosine (<=>, vector_cosine_ops) and inner-product (<#>, vector_ip_ops)
+HNSW search over the unit-normalized Chunk vectors: server-side execution
+time per query (from EXPLAIN ANALYZE, i.e. database CPU without the network
+round-trip), client latency and recall@k against an exact scan.
+
+    python -m benchmarks.inner_product --queries 200 --k 10
+"""
+import argparse
+import asyncio
+import json
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from sqlmodel import select
+
+from src.chunk.model import Chunk
+from src.db.vector_search import VectorSearch
+from benchmarks.common import (
+    Timer,
+    latency_summary,
+    make_session_maker,
+    print_report,
+    recall_at_k,
+    sample_query_vectors,
+)
+
+METRICS = ["cosine", "inner_product"]
+
+
+def top_k_query(metric: str, query_vector, k: int):
+    distance = VectorSearch(None, precision="full", metric=metric)._distance(query_vector)
+    return select(Chunk.id).order_by(distance).limit(k)
+
+
+async def execution_ms(session, query) -> float:
+    """Server-side execution time of a query, from EXPLAIN ANALYZE"""
+    compiled = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+    result = await session.exec(text(f"EXPLAIN (ANALYZE, FORMAT JSON) {compiled}"))
+    plan = result.first()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Execution Time"]
+
+
+async def run(queries: int, k: int):
+    engine, session_maker = make_session_maker()
+    async with session_maker() as session:
+        vectors = await sample_query_vectors(session, queries)
+        if not vectors:
+            raise SystemExit("The Chunk table is empty")
+        # Questions are normalized by the embedding provider too
+        vectors = [vector / np.linalg.norm(vector) for vector in vectors]
+
+        await session.exec(text("SET enable_indexscan = off"))
+        exact = [
+            (await session.exec(top_k_query("cosine", vector, k))).all() for vector in vectors
+        ]
+        await session.exec(text("SET enable_indexscan = on"))
+
+        report = {}
+        for metric in METRICS:
+            latencies, server_ms, recalls = [], [], []
+            for vector, exact_ids in zip(vectors, exact):
+                query = top_k_query(metric, vector, k)
+                with Timer() as timer:
+                    ids = (await session.exec(query)).all()
+                latencies.append(timer.ms)
+                server_ms.append(await execution_ms(session, query))
+                recalls.append(recall_at_k(ids, exact_ids))
+            report[metric] = {
+                **latency_summary(latencies),
+                "server_p50_ms": float(np.percentile(server_ms, 50)),
+                "server_mean_ms": float(np.mean(server_ms)),
+                f"recall@{k}": sum(recalls) / len(recalls),
+            }
+    await engine.dispose()
+    print_report(f"{len(vectors)} queries, k={k}", report)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(run(args.queries, args.k))
@@ -13,6 +13,10 @@ from src.admin.model import Admin
 from src.file.model import File
 from src.chunk.model import Chunk
 from src.token_blacklist.model import TokenBlacklist
+from src.embedding_cache.model import EmbeddingCache
+from src.answer_cache.model import AnswerCache
+from src.section.model import Section
+from src.ingest_job.model import IngestJob
 from sqlmodel import SQLModel
 from src.config import Config
 
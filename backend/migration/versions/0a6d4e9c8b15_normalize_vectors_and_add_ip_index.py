@@ -0,0 +1,37 @@
+"""normalize vectors and add inner product index
+
+Revision ID: 0a6d4e9c8b15
+Revises: f19b7c3d5a62
+Create Date: 2026-10-18 17:31:50.904415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0a6d4e9c8b15'
+down_revision: Union[str, Sequence[str], None] = 'f19b7c3d5a62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Embeddings are unit-normalized from now on; bring stored ones in line.
+    # Cosine distances are unchanged, so existing indexes stay valid.
+    # l2_normalize requires pgvector >= 0.7.0
+    op.execute('UPDATE "Chunk" SET vector = l2_normalize(vector)')
+    op.execute('UPDATE "Embedding_cache" SET vector = l2_normalize(vector)')
+    op.execute('UPDATE "Answer_cache" SET question_vector = l2_normalize(question_vector)')
+    op.create_index('idx_chunk_vector_ip_hnsw', 'Chunk', ['vector'], unique=False, postgresql_using='hnsw', postgresql_with={'m': 16, 'ef_construction': 64}, postgresql_ops={'vector': 'vector_ip_ops'})
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Normalized vectors are left as they are: cosine search does not need the norms
+    op.drop_index('idx_chunk_vector_ip_hnsw', table_name='Chunk', postgresql_using='hnsw', postgresql_with={'m': 16, 'ef_construction': 64}, postgresql_ops={'vector': 'vector_ip_ops'})
@@ -0,0 +1,38 @@
+"""add file_deleted to chunk
+
+Revision ID: 3b9e51c07a2f
+Revises: 75aa09859dba
+Create Date: 2026-10-18 11:52:04.318620
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3b9e51c07a2f'
+down_revision: Union[str, Sequence[str], None] = '75aa09859dba'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        'Chunk',
+        sa.Column('file_deleted', sa.BOOLEAN(), server_default=sa.false(), nullable=False),
+    )
+    # Backfill from the files that are already soft-deleted
+    op.execute(
+        'UPDATE "Chunk" SET file_deleted = true '
+        'FROM "File" WHERE "File".id = "Chunk".file_id AND "File".deleted'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('Chunk', 'file_deleted')
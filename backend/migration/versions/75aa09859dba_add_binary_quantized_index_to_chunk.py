@@ -0,0 +1,35 @@
+"""add binary quantized index to chunk
+
+Revision ID: 75aa09859dba
+Revises: 768ad84d865d
+Create Date: 2026-10-18 10:41:17.220954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '75aa09859dba'
+down_revision: Union[str, Sequence[str], None] = '768ad84d865d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # binary_quantize requires pgvector >= 0.7.0
+    op.execute(
+        'CREATE INDEX idx_chunk_vector_binary_hnsw ON "Chunk" '
+        'USING hnsw ((CAST(binary_quantize(vector) AS bit(768))) bit_hamming_ops) '
+        'WITH (m = 16, ef_construction = 64)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS idx_chunk_vector_binary_hnsw')
@@ -0,0 +1,35 @@
+"""add halfvec index to chunk
+
+Revision ID: 768ad84d865d
+Revises: 6065746871d4
+Create Date: 2026-10-18 10:02:51.604173
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = '768ad84d865d'
+down_revision: Union[str, Sequence[str], None] = '6065746871d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # halfvec requires pgvector >= 0.7.0
+    op.execute(
+        'CREATE INDEX idx_chunk_vector_halfvec_cosine_hnsw ON "Chunk" '
+        'USING hnsw ((CAST(vector AS halfvec(768))) halfvec_cosine_ops) '
+        'WITH (m = 16, ef_construction = 64)'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP INDEX IF EXISTS idx_chunk_vector_halfvec_cosine_hnsw')
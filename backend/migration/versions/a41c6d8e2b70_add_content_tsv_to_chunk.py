@@ -0,0 +1,50 @@
+"""add content_tsv to chunk
+
+Revision ID: a41c6d8e2b70
+Revises: 3b9e51c07a2f
+Create Date: 2026-10-18 14:52:37.604112
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector.sqlalchemy
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c6d8e2b70'
+down_revision: Union[str, Sequence[str], None] = '3b9e51c07a2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE EXTENSION IF NOT EXISTS unaccent')
+    # "simple" keeps every word (no stemming or stop words for Vietnamese),
+    # unaccent strips tone marks and maps đ to d before indexing
+    op.execute('CREATE TEXT SEARCH CONFIGURATION vietnamese_unaccent (COPY = simple)')
+    op.execute(
+        'ALTER TEXT SEARCH CONFIGURATION vietnamese_unaccent '
+        'ALTER MAPPING FOR hword, hword_part, word WITH unaccent, simple'
+    )
+    op.add_column(
+        'Chunk',
+        sa.Column(
+            'content_tsv',
+            postgresql.TSVECTOR(),
+            sa.Computed("to_tsvector('vietnamese_unaccent'::regconfig, content)", persisted=True),
+            nullable=True,
+        ),
+    )
+    op.create_index('idx_chunk_content_tsv_gin', 'Chunk', ['content_tsv'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_chunk_content_tsv_gin', table_name='Chunk', postgresql_using='gin')
+    op.drop_column('Chunk', 'content_tsv')
+    op.execute('DROP TEXT SEARCH CONFIGURATION IF EXISTS vietnamese_unaccent')
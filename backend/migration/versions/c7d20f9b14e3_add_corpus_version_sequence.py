@@ -0,0 +1,30 @@
+"""add corpus version sequence
+
+Revision ID: c7d20f9b14e3
+Revises: a41c6d8e2b70
+Create Date: 2026-10-18 15:20:11.482907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+import pgvector.sqlalchemy
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d20f9b14e3'
+down_revision: Union[str, Sequence[str], None] = 'a41c6d8e2b70'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute('CREATE SEQUENCE IF NOT EXISTS corpus_version_seq')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute('DROP SEQUENCE IF EXISTS corpus_version_seq')
@@ -1,7 +1,9 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse
 import os
+import asyncio
 from fastapi.exceptions import HTTPException
 from starlette.exceptions import HTTPException as StarletteHTTPException
 from starlette.requests import Request
@@ -9,14 +11,48 @@ from fastapi.middleware.cors import CORSMiddleware
 from src.auth.router import auth_router
 from src.file.router import file_router
 from src.chat.router import chat_router
+from src.monitoring.router import monitoring_router
+from src.shared.SentenceTransformer import embedding_provider
+from src.shared.reranker import reranker
+from src.chat.utils import question_embedder
+from src.chat.context import warm_up_tokenizers
+from src.file.worker_pool import ingest_pool
+from src.file.router import ingest_worker
+from src.file.dependency import reject_oversized_upload
+from src.config import Config
 # Import all models to ensure they are registered with SQLAlchemy
 # This must be done before any SQLAlchemy operations
 import src.db  # This will import all models
 
 version = "v1"
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load the embedding model before serving so the first /ask is not slow.
+    # Workers that never embed (e.g. auth-only replicas) set EMBEDDING_WARMUP=false.
+    if Config.EMBEDDING_WARMUP:
+        await asyncio.to_thread(embedding_provider.warm_up)
+        if Config.RERANK_ENABLED:
+            await asyncio.to_thread(reranker.warm_up)
+    tokenizer_warmup = None
+    if Config.CONTEXT_TOKENIZER_WARMUP:
+        # In the background: requests only read tokenizers from the local
+        # cache and estimate token counts until the download is done
+        tokenizer_warmup = asyncio.create_task(asyncio.to_thread(warm_up_tokenizers))
+    if Config.INGEST_WORKER_ENABLED:
+        ingest_worker.start()
+    yield
+    if tokenizer_warmup is not None:
+        tokenizer_warmup.cancel()
+    await ingest_worker.stop()
+    await question_embedder.close()
+    await asyncio.to_thread(ingest_pool.shutdown)
+
+
 app = FastAPI(
     version=version,
+    lifespan=lifespan,
 )
 app.mount("/assets", StaticFiles(directory="static/assets"), name="assets")
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -33,6 +69,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.middleware("http")(reject_oversized_upload)
 
 # React entry point
 @app.get("/")
@@ -42,6 +79,7 @@ async def index():
 app.include_router(auth_router, prefix=f"/api/{version}/auth", tags=["auth"])
 app.include_router(file_router, prefix=f"/api/{version}/admin/file", tags=["file"])
 app.include_router(chat_router, prefix=f"/api/{version}/user/chat", tags=["chat"])
+app.include_router(monitoring_router, prefix=f"/api/{version}/admin/monitoring", tags=["monitoring"])
 @app.get("/{full_path:path}")
 async def serve_react_app(full_path: str, request: Request):
     file_path = os.path.join("static", full_path)
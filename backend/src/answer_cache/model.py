@@ -0,0 +1,46 @@
+from sqlmodel import Column, Field, SQLModel, Index
+import sqlalchemy.dialects.postgresql as pg
+from pgvector.sqlalchemy import Vector
+from datetime import datetime
+import uuid
+
+from src.chunk.model import EMBEDDING_DIMENSION
+
+
+class AnswerCache(SQLModel, table=True):
+    """
+    Generated answers keyed by the embedding of the question that produced them.
+    /ask serves a stored answer for a near-duplicate question when the LLM,
+    the embedding model and the corpus version all match.
+    """
+    __tablename__ = "Answer_cache"
+    __table_args__ = (
+        Index(
+            "idx_answer_cache_question_vector_hnsw",
+            "question_vector",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"question_vector": "vector_cosine_ops"},
+        ),
+    )
+
+    id: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
+    )
+    question: str
+    question_vector: list[float] = Field(
+        sa_column=Column(Vector(EMBEDDING_DIMENSION), nullable=False)
+    )
+    answer: str
+    answer_tokens: int = Field(default=0)
+    model_id: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    embedding_model: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    corpus_version: int = Field(sa_column=Column(pg.BIGINT, nullable=False))
+    hits: int = Field(default=0)
+    created_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, index=True)
+    )
+    last_hit_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, nullable=True))
+
+    def __repr__(self):
+        return f"<AnswerCache {self.model_id} v{self.corpus_version} - {self.question}>"
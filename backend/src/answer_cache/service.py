@@ -0,0 +1,130 @@
+from sqlmodel import select, update, delete, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime, timedelta
+from typing import List, Optional
+import logging
+import time
+
+from .model import AnswerCache
+
+logger = logging.getLogger(__name__)
+
+# Expired entries are never served; they are deleted at most this often per worker
+EVICTION_INTERVAL_SECONDS = 600.0
+
+
+class AnswerCacheService:
+    """
+    Service for the semantic answer cache.
+    Keeps per-worker hit counters; totals across workers come from the table.
+    """
+
+    def __init__(self, max_distance: float, ttl: timedelta):
+        self.max_distance = max_distance
+        self.ttl = ttl
+        self.lookups = 0
+        self.hits = 0
+        self.tokens_saved = 0
+        self._next_eviction = 0.0
+
+    async def lookup(
+        self,
+        question_vector: List[float],
+        model_id: str,
+        embedding_model: str,
+        corpus_version: int,
+        session: AsyncSession,
+    ) -> Optional[AnswerCache]:
+        """
+        Return the cached answer of the closest earlier question, if it is
+        within max_distance and was produced by the same LLM and embedding
+        model for the current corpus version
+        """
+        self.lookups += 1
+        distance = AnswerCache.question_vector.cosine_distance(question_vector)
+        statement = (
+            select(AnswerCache, distance.label("distance"))
+            .where(
+                AnswerCache.model_id == model_id,
+                AnswerCache.embedding_model == embedding_model,
+                AnswerCache.corpus_version == corpus_version,
+                AnswerCache.created_at > datetime.now() - self.ttl,
+            )
+            .order_by(distance)
+            .limit(1)
+        )
+        result = await session.exec(statement)
+        row = result.first()
+        if row is None or row.distance > self.max_distance:
+            return None
+
+        entry = row.AnswerCache
+        await session.exec(
+            update(AnswerCache)
+            .where(AnswerCache.id == entry.id)
+            .values(hits=AnswerCache.hits + 1, last_hit_at=datetime.now())
+        )
+        await session.commit()
+        self.hits += 1
+        self.tokens_saved += entry.answer_tokens
+        return entry
+
+    async def store(
+        self,
+        question: str,
+        question_vector: List[float],
+        answer: str,
+        answer_tokens: int,
+        model_id: str,
+        embedding_model: str,
+        corpus_version: int,
+        session: AsyncSession,
+    ) -> None:
+        session.add(
+            AnswerCache(
+                question=question,
+                question_vector=list(question_vector),
+                answer=answer,
+                answer_tokens=answer_tokens,
+                model_id=model_id,
+                embedding_model=embedding_model,
+                corpus_version=corpus_version,
+            )
+        )
+        await session.commit()
+
+        if time.monotonic() >= self._next_eviction:
+            self._next_eviction = time.monotonic() + EVICTION_INTERVAL_SECONDS
+            evicted = await self.evict_expired(session)
+            if evicted:
+                logger.info(f"Evicted {evicted} expired answer cache entries")
+
+    async def evict_expired(self, session: AsyncSession) -> int:
+        """Remove entries older than the TTL and return how many were removed"""
+        statement = delete(AnswerCache).where(
+            AnswerCache.created_at < datetime.now() - self.ttl
+        )
+        result = await session.exec(statement)
+        await session.commit()
+        return result.rowcount
+
+    async def totals(self, session: AsyncSession) -> dict:
+        """Entries, hits and generated tokens saved across all workers"""
+        statement = select(
+            func.count(AnswerCache.id),
+            func.coalesce(func.sum(AnswerCache.hits), 0),
+            func.coalesce(func.sum(AnswerCache.hits * AnswerCache.answer_tokens), 0),
+        )
+        result = await session.exec(statement)
+        entries, hits, tokens_saved = result.first()
+        return {"entries": entries, "hits": hits, "tokens_saved": tokens_saved}
+
+    def stats(self) -> dict:
+        return {
+            "max_distance": self.max_distance,
+            "ttl_seconds": self.ttl.total_seconds(),
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.lookups if self.lookups else 0.0,
+            "tokens_saved": self.tokens_saved,
+        }
@@ -0,0 +1,145 @@
+"""
+Token-budgeted context packing for the /ask prompt.
+Retrieved chunks are packed in retrieval order (vector, RRF or reranker
+order) until CONTEXT_TOKEN_BUDGET tokens of the target model are used, so a
+broad question can never build a prompt larger than the model's context window.
+The chat model's tokenizer can be downloaded by warm_up_tokenizers after
+startup; on the request path tokenizers are only read from the local cache.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Sequence
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Ollama model family -> Hugging Face tokenizer of the same model
+OLLAMA_TOKENIZERS = {
+    "qwen2": "Qwen/Qwen2-0.5B-Instruct",
+    "qwen2.5": "Qwen/Qwen2.5-0.5B-Instruct",
+    "qwen3": "Qwen/Qwen3-0.6B",
+    # meta-llama repos are gated: without HF_TOKEN at warm-up, tokens are estimated
+    "llama3": "meta-llama/Meta-Llama-3-8B-Instruct",
+    "llama3.2": "meta-llama/Llama-3.2-1B-Instruct",
+    "gemma2": "google/gemma-2-2b-it",
+    "mistral": "mistralai/Mistral-7B-Instruct-v0.3",
+}
+
+# Neighbouring chunks overlap by up to CHUNK_OVERLAP characters; shorter
+# matches are too likely to be coincidence to strip
+MAX_OVERLAP_CHARS = Config.CHUNK_OVERLAP
+MIN_OVERLAP_CHARS = min(16, Config.CHUNK_OVERLAP)
+
+# A tokenizer that failed to load is tried again after this long; until then
+# tokens are estimated
+TOKENIZER_RETRY_SECONDS = 300.0
+
+_token_counters: Dict[str, Callable[[str], int]] = {}
+_token_counter_failures: Dict[str, float] = {}
+_token_counters_lock = threading.Lock()
+
+
+class PackedContext(NamedTuple):
+    chunks: List[str]
+    token_count: int
+    dropped: int
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough count for models without a known tokenizer (~4 characters per token)"""
+    return len(text) // 4 + 1
+
+
+def get_token_counter(model_id: str, allow_download: bool = False) -> Callable[[str], int]:
+    """
+    Token counting function for an Ollama model, loaded once per model family.
+    Without allow_download only locally cached tokenizers are used, so a
+    request never waits on (or fails with) a Hugging Face download.
+    """
+    family = (model_id or "").split(":", 1)[0]
+    counter = _token_counters.get(family)
+    if counter is not None:
+        return counter
+    tokenizer_name = OLLAMA_TOKENIZERS.get(family)
+    if tokenizer_name is None:
+        _token_counters[family] = _estimate_tokens
+        return _estimate_tokens
+    failed_at = _token_counter_failures.get(family)
+    if not allow_download and failed_at is not None and time.monotonic() - failed_at < TOKENIZER_RETRY_SECONDS:
+        return _estimate_tokens
+
+    with _token_counters_lock:
+        if family not in _token_counters:
+            try:
+                from transformers import AutoTokenizer
+
+                tokenizer = AutoTokenizer.from_pretrained(
+                    tokenizer_name, local_files_only=not allow_download
+                )
+                _token_counters[family] = lambda text: len(tokenizer.encode(text, add_special_tokens=False))
+                _token_counter_failures.pop(family, None)
+            except Exception as e:
+                # Not cached for good: a later download or warm-up may still succeed
+                _token_counter_failures[family] = time.monotonic()
+                logger.warning(
+                    f"Could not load tokenizer {tokenizer_name} for {model_id}, "
+                    f"estimating tokens from characters: {str(e)}"
+                )
+                return _estimate_tokens
+    return _token_counters[family]
+
+
+def warm_up_tokenizers(model_id: str = None):
+    """Download (if needed) and load the tokenizer of the chat model"""
+    get_token_counter(model_id or Config.CHAT_MODEL_ID, allow_download=True)
+
+
+def _strip_overlap(text: str, packed: Sequence[str]) -> str:
+    """Remove the text a chunk shares with a neighbouring chunk already packed"""
+    for other in packed:
+        longest = min(MAX_OVERLAP_CHARS, len(text), len(other))
+        for size in range(longest, MIN_OVERLAP_CHARS - 1, -1):
+            if other.endswith(text[:size]):
+                text = text[size:].lstrip()
+                break
+            if other.startswith(text[-size:]):
+                text = text[:-size].rstrip()
+                break
+    return text
+
+
+def pack_context(hits: Sequence, model_id: str, budget: int = None) -> PackedContext:
+    """
+    Pack search hits (anything with .content and .file_id) into the token
+    budget in the order given, which is the best-first order of the retriever
+    or reranker. Exact duplicates and the overlap
+    between neighbouring chunks of the same file are not counted twice;
+    hits that do not fit are dropped, smaller ones after them may still fit.
+    """
+    budget = budget or Config.CONTEXT_TOKEN_BUDGET
+    count_tokens = get_token_counter(model_id)
+
+    chunks: List[str] = []
+    packed_by_file: Dict[object, List[str]] = {}
+    token_count = 0
+    dropped = 0
+    for hit in hits:
+        same_file = packed_by_file.setdefault(hit.file_id, [])
+        if hit.content in same_file:
+            continue
+        text = _strip_overlap(hit.content, same_file)
+        if not text:
+            continue
+        tokens = count_tokens(text)
+        if token_count + tokens > budget:
+            dropped += 1
+            continue
+        chunks.append(text)
+        same_file.append(hit.content)
+        token_count += tokens
+
+    if dropped:
+        logger.info(f"Context budget of {budget} tokens reached, dropped {dropped} of {len(hits)} chunks")
+    return PackedContext(chunks, token_count, dropped)
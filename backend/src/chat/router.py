@@ -1,4 +1,5 @@
 from uuid import UUID
+import asyncio
 from requests import session
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
@@ -13,8 +14,17 @@ from typing import List, Optional
 from datetime import datetime
 from src.db.vector_search import VectorSearch
 from .schema import RenameChatSchema
+from src.db.corpus_version import get_corpus_version
+from src.shared.SentenceTransformer import embedding_provider
+from src.shared.reranker import reranker
+from .context import pack_context
+from src.config import Config
 from .utils import (
-    question_embedding,
+    question_embedding_async,
+    normalize_question,
+    retrieval_cache,
+    answer_cache_service,
+    cached_answer_gen,
     construct_prompt,
     query_ollama,
     translate_to_vietnam,
@@ -103,46 +113,87 @@ async def ask_question(
                 )
             chat_id = request.chat_id
 
+        # Repeated questions against an unchanged corpus reuse the earlier results
+        corpus_version = await get_corpus_version(session)
+        cache_key = (corpus_version, request.search_mode, normalize_question(request.question))
+        similar_chunks = retrieval_cache.get(cache_key)
+
         # Embed the question
-        try:
-            query_vector = question_embedding(request.question)
-        except Exception as e:
-            raise HTTPException(
-                status_code=400, detail=f"Failed to embed question: {str(e)}"
+        query_vector = None
+        if similar_chunks is None or Config.ANSWER_CACHE_ENABLED:
+            try:
+                query_vector = await question_embedding_async(request.question)
+            except Exception as e:
+                raise HTTPException(
+                    status_code=400, detail=f"Failed to embed question: {str(e)}"
+                )
+
+        # Near-duplicate questions can reuse an earlier answer and skip the LLM
+        cached_answer = None
+        if Config.ANSWER_CACHE_ENABLED:
+            cached_answer = await answer_cache_service.lookup(
+                query_vector,
+                model_id=request.model_id,
+                embedding_model=embedding_provider.cache_key,
+                corpus_version=corpus_version,
+                session=session,
             )
 
-        # Perform tiered vector search
-        vector_search = VectorSearch(session)
-        await vector_search.optimize_search_parameters()  # Optimize for HNSW index
-        
-        # Use tiered search: all chunks with >0.7 similarity + up to 5 chunks with 0.5-0.7 similarity
-        similar_chunks = await vector_search.similarity_search_tiered(
-            query_vector=query_vector,
-            high_threshold=0.7,     # All chunks with >70% similarity
-            medium_threshold=0.5,   # Up to 5 chunks with 50-70% similarity
-            max_medium_results=5
-        )
+        if cached_answer is None and similar_chunks is None:
+            # Perform vector search (search parameters are set per connection)
+            vector_search = VectorSearch(session)
 
-        # Prepare context from chunks
-        context = [chunk.content for chunk in similar_chunks]
-        chunk_ids = [str(chunk.id) for chunk in similar_chunks]
+            # Tiered by default: all chunks with >0.7 similarity + up to 5 chunks with 0.5-0.7 similarity
+            similar_chunks = tuple(await vector_search.retrieve(
+                request.search_mode, query_vector, request.question
+            ))
+            retrieval_cache.set(cache_key, similar_chunks)
 
         # Store question in Chat_history
         question_entry = Chat_history(
             content=request.question,
             source="user",
             chat_id=chat_id,
-            model=request.model_id or "qwen2:0.5b",
+            model=request.model_id or Config.CHAT_MODEL_ID,
         )
         session.add(question_entry)
         await session.commit()  # Commit question immediately
 
+        if cached_answer is not None:
+            return StreamingResponse(
+                cached_answer_gen(cached_answer.answer, session, chat_id, request.model_id),
+                media_type="text/event-stream",
+            )
+
+        # Keep only the chunks a cross-encoder finds most relevant (vector order on timeout)
+        if Config.RERANK_ENABLED:
+            similar_chunks, _ = await reranker.rerank(request.question, similar_chunks)
+
+        # Small chunks match precisely; the LLM reads the sections they belong to
+        if Config.SEARCH_EXPAND_SECTIONS:
+            similar_chunks = await VectorSearch(session).expand_to_sections(similar_chunks)
+
+        # Prepare context from chunks, within the token budget of the model
+        packed = await asyncio.to_thread(pack_context, similar_chunks, request.model_id)
+        context = packed.chunks
+
         # Call LLM
         try:
             prompt = construct_prompt(request.question, context)
+            answer_cache_args = {}
+            if Config.ANSWER_CACHE_ENABLED:
+                answer_cache_args = {
+                    "question": request.question,
+                    "question_vector": query_vector,
+                    "corpus_version": corpus_version,
+                }
             return StreamingResponse(
-                chat_gen(prompt, session, chat_id, request.model_id),
+                chat_gen(prompt, session, chat_id, request.model_id, **answer_cache_args),
                 media_type="text/event-stream",
+                headers={
+                    "X-Context-Tokens": str(packed.token_count),
+                    "X-Context-Dropped-Chunks": str(packed.dropped),
+                },
             )
         #     answer = query_ollama(prompt)
         except Exception as e:
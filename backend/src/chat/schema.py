@@ -1,14 +1,17 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import Literal, Optional
 import uuid
 from datetime import datetime
+from src.config import Config
 
 
 class QuestionSchema(BaseModel):
     """Request model for question endpoint"""
     chat_id: Optional[uuid.UUID] = None
     question: str
-    model_id: Optional[str] = "qwen2:0.5b"
+    model_id: Optional[str] = Config.CHAT_MODEL_ID
+    # "hybrid" adds full-text matching, for questions with codes or proper nouns
+    search_mode: Literal["tiered", "hybrid", "binary"] = "tiered"
     # translate_to_vietnamese: bool = False  # Optional flag for translation
 
 class CreateChatSchema(BaseModel):
@@ -1,7 +1,13 @@
-from src.shared.SentenceTransformer import model
-from typing import List
+from src.shared.SentenceTransformer import embedding_provider
+from src.shared.cache import LRUCache
+from src.shared.embedding_batcher import EmbeddingBatcher
+from src.answer_cache.service import AnswerCacheService
+from src.config import Config
+from datetime import timedelta
+from typing import List, Optional
 import requests
 import re
+import unicodedata
 from ollama import AsyncClient
 from sqlmodel.ext.asyncio.session import AsyncSession
 from src.chat_history.model import Chat_history
@@ -13,9 +19,47 @@ from deep_translator import GoogleTranslator
 OLLAMA_API_URL = "http://localhost:11434/api/generate"
 OLLAMA_MODEL = "qwen3:0.6b"
 
-
-def question_embedding(query: str, max_length=1024):
-    question_vect = model.encode(query)
+question_embedding_cache = LRUCache(
+    maxsize=Config.QUESTION_CACHE_SIZE,
+    ttl_seconds=Config.QUESTION_CACHE_TTL_SECONDS,
+)
+
+# Search results keyed by (corpus version, search mode, normalized question);
+# entries of older corpus versions are never hit again and age out of the LRU
+retrieval_cache = LRUCache(maxsize=Config.RETRIEVAL_CACHE_SIZE)
+
+answer_cache_service = AnswerCacheService(
+    max_distance=Config.ANSWER_CACHE_MAX_DISTANCE,
+    ttl=timedelta(hours=Config.ANSWER_CACHE_TTL_HOURS),
+)
+
+question_embedder = EmbeddingBatcher(
+    lambda texts: embedding_provider.encode(
+        texts, batch_size=len(texts), convert_to_numpy=True, show_progress_bar=False
+    ),
+    max_batch_size=Config.EMBEDDING_BATCH_MAX_SIZE,
+    max_wait_ms=Config.EMBEDDING_BATCH_MAX_WAIT_MS,
+)
+
+
+def normalize_question(query: str) -> str:
+    """Cache key for a question: NFC-normalized, whitespace-collapsed, case-folded."""
+    return " ".join(unicodedata.normalize("NFC", query).split()).casefold()
+
+
+async def question_embedding_async(query: str):
+    """
+    Embed a question, reusing the cached vector for repeated questions.
+    Cache misses are encoded off the event loop, batched together with
+    questions from concurrent requests.
+    """
+    key = normalize_question(query)
+    question_vect = question_embedding_cache.get(key)
+    if question_vect is None:
+        question_vect = await question_embedder.embed(query)
+        # Cached vectors are shared between requests, so keep them immutable
+        question_vect.setflags(write=False)
+        question_embedding_cache.set(key, question_vect)
     return question_vect
 
 
@@ -59,7 +103,19 @@ def query_ollama(prompt: str, model_id: str) -> str:
         raise Exception(f"Ollama API request failed: {str(e)}")
 
 
-async def chat_gen(prompt: str, session: AsyncSession, chat_id: str, model_id: str):
+async def chat_gen(
+    prompt: str,
+    session: AsyncSession,
+    chat_id: str,
+    model_id: str,
+    question: Optional[str] = None,
+    question_vector=None,
+    corpus_version: Optional[int] = None,
+):
+    """
+    Stream the LLM answer and store it in Chat_history. When question_vector
+    and corpus_version are given, the answer is also added to the answer cache.
+    """
     message = {"role": "user", "content": prompt}
     end_think = False  # Set to True to start yielding content immediately
     answer = ""
@@ -101,11 +157,46 @@ async def chat_gen(prompt: str, session: AsyncSession, chat_id: str, model_id: s
                 except Exception as e:
                     print(f"Error saving answer to database: {str(e)}")
                     await session.rollback()
+
+                # Cache the text that was streamed, so a hit replays exactly that;
+                # cached_answer_gen translates it for Chat_history like above
+                if question_vector is not None and corpus_version is not None and answer:
+                    try:
+                        await answer_cache_service.store(
+                            question=question,
+                            question_vector=question_vector,
+                            answer=answer,
+                            answer_tokens=part.get("eval_count") or len(answer) // 4,
+                            model_id=model_id,
+                            embedding_model=embedding_provider.cache_key,
+                            corpus_version=corpus_version,
+                            session=session,
+                        )
+                    except Exception as e:
+                        print(f"Error saving answer to cache: {str(e)}")
+                        await session.rollback()
     except Exception as e:
         print(f"Error in chat generation: {str(e)}")
         # Don't rollback here as it might affect the question that was already saved
 
 
+async def cached_answer_gen(answer: str, session: AsyncSession, chat_id: str, model_id: str):
+    """Stream an answer from the answer cache and store it in Chat_history like chat_gen."""
+    yield answer
+    try:
+        answer_entry = Chat_history(
+            content=translate_to_vietnam(answer),
+            source="bot",
+            chat_id=chat_id,
+            model=model_id,
+        )
+        session.add(answer_entry)
+        await session.commit()
+    except Exception as e:
+        print(f"Error saving answer to database: {str(e)}")
+        await session.rollback()
+
+
 def translate_to_vietnam(answer: str) -> str:
     # Translate text to Vietnamese
     try:
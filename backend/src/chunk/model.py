@@ -1,13 +1,19 @@
 from sqlmodel import Column, Field, SQLModel, ForeignKey, Index, Relationship
+from sqlalchemy import Computed, cast, func, false
 import sqlalchemy.dialects.postgresql as pg
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import Vector, HALFVEC, BIT
 from datetime import datetime
-from typing import TYPE_CHECKING
+from typing import Optional, TYPE_CHECKING
 import uuid
 
 if TYPE_CHECKING:
     from src.file.model import File  # Avoid circular import issues
 
+EMBEDDING_DIMENSION = 768
+# Full-text search configuration: "simple" with diacritics stripped by unaccent,
+# so Vietnamese words match with or without tone marks (created by migration)
+TEXT_SEARCH_CONFIG = "vietnamese_unaccent"
+
 
 class Chunk(SQLModel, table=True):
     __tablename__ = "Chunk"
@@ -20,6 +26,17 @@ class Chunk(SQLModel, table=True):
             postgresql_with={"m": 16, "ef_construction": 64},
             postgresql_ops={"vector": "vector_cosine_ops"},
         ),
+        # HNSW index for inner-product search over unit-normalized vectors
+        # (VECTOR_METRIC=inner_product)
+        Index(
+            "idx_chunk_vector_ip_hnsw",
+            "vector",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 16, "ef_construction": 64},
+            postgresql_ops={"vector": "vector_ip_ops"},
+        ),
+        # GIN index for the full-text half of hybrid search
+        Index("idx_chunk_content_tsv_gin", "content_tsv", postgresql_using="gin"),
         # Optional: IVFFlat index for cosine similarity (alternative)
         # Index(
         #     "idx_chunk_vector_cosine_ivfflat",
@@ -35,10 +52,24 @@ class Chunk(SQLModel, table=True):
     )
 
     content: str
+    content_tsv: Optional[str] = Field(
+        default=None,
+        sa_column=Column(
+            pg.TSVECTOR,
+            Computed(f"to_tsvector('{TEXT_SEARCH_CONFIG}'::regconfig, content)", persisted=True),
+        ),
+    )
     vector: list[float] = Field(
-        sa_column=Column(Vector(768), nullable=False)
+        sa_column=Column(Vector(EMBEDDING_DIMENSION), nullable=False)
     )  # 1536 is common for OpenAI embeddings
     file_id: uuid.UUID = Field(foreign_key="File.id", nullable=False)
+    # Position of the chunk in its file, and the parent section it was split from
+    ordinal: Optional[int] = Field(default=None, nullable=True)
+    section_id: Optional[uuid.UUID] = Field(default=None, foreign_key="Section.id", nullable=True)
+    # Copy of File.deleted, so searches can filter without joining File
+    file_deleted: bool = Field(
+        sa_column=Column(pg.BOOLEAN, nullable=False, default=False, server_default=false())
+    )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(
         sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
@@ -52,3 +83,26 @@ class Chunk(SQLModel, table=True):
 
     def __repr__(self):
         return f"<Chunk - file_id: {self.file_id}\n    {self.content}>"
+
+
+# Half-precision HNSW index over the same column (pgvector >= 0.7).
+# Half the size of the float32 index, so it stays in shared_buffers on large
+# corpora; used by VectorSearch when VECTOR_INDEX_PRECISION is "half".
+Index(
+    "idx_chunk_vector_halfvec_cosine_hnsw",
+    cast(Chunk.__table__.c.vector, HALFVEC(EMBEDDING_DIMENSION)).label("vector_halfvec"),
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"vector_halfvec": "halfvec_cosine_ops"},
+)
+
+# Hamming-distance HNSW index over binary-quantized vectors (1 bit per
+# dimension, 32x smaller than float32), used as the first pass of
+# VectorSearch.similarity_search_binary_tiered before exact rescoring.
+Index(
+    "idx_chunk_vector_binary_hnsw",
+    cast(func.binary_quantize(Chunk.__table__.c.vector), BIT(EMBEDDING_DIMENSION)).label("vector_binary"),
+    postgresql_using="hnsw",
+    postgresql_with={"m": 16, "ef_construction": 64},
+    postgresql_ops={"vector_binary": "bit_hamming_ops"},
+)
@@ -0,0 +1,130 @@
+from sqlalchemy import insert
+from sqlmodel.ext.asyncio.session import AsyncSession
+from pgvector import Vector
+from datetime import datetime
+from itertools import islice
+from typing import Iterable, List, NamedTuple, Optional
+import logging
+import uuid
+
+import numpy as np
+
+from src.config import Config
+from .model import Chunk
+
+logger = logging.getLogger(__name__)
+
+# content_tsv is generated by Postgres and never written
+COPY_COLUMNS = (
+    "id", "content", "vector", "file_id", "ordinal", "section_id",
+    "file_deleted", "created_at", "updated_at",
+)
+
+
+class ChunkRow(NamedTuple):
+    content: str
+    vector: np.ndarray
+    file_id: uuid.UUID
+    ordinal: Optional[int] = None
+    section_id: Optional[uuid.UUID] = None
+
+
+def _encode_vector(value) -> bytes:
+    # Binary wire format of pgvector, straight from the float32 embedding row
+    return Vector._to_db_binary(value)
+
+
+class ChunkWriter:
+    """
+    Bulk writer for Chunk rows.
+    "copy" streams rows with binary COPY over the session's own asyncpg
+    connection; "insert" sends multi-row INSERTs. Both run in the caller's
+    transaction, in bounded batches, and leave the commit to the caller.
+    """
+
+    def __init__(self, batch_size: int = 2000, method: str = "copy"):
+        if method not in ("copy", "insert"):
+            raise ValueError(f"Unknown chunk write method: {method}")
+        self.batch_size = batch_size
+        self.method = method
+
+    async def write(self, session: AsyncSession, rows: Iterable[ChunkRow]) -> int:
+        """Write rows, batch_size at a time; returns the number of rows written"""
+        connection = None
+        if self.method == "copy":
+            connection = await self._asyncpg_connection(session)
+            if connection is None:
+                logger.warning("COPY needs the asyncpg driver, falling back to batched inserts")
+
+        rows = iter(rows)
+        written = 0
+        if connection is not None:
+            # Binary COPY needs a binary codec for vector. It is only installed for
+            # the COPY: SQLAlchemy sends vectors in text form on this same connection.
+            await connection.set_type_codec(
+                "vector",
+                schema="public",
+                encoder=_encode_vector,
+                decoder=Vector._from_db_binary,
+                format="binary",
+            )
+        try:
+            while True:
+                batch = list(islice(rows, self.batch_size))
+                if not batch:
+                    break
+                now = datetime.now()
+                if connection is not None:
+                    await self._copy(connection, batch, now)
+                else:
+                    await self._insert(session, batch, now)
+                written += len(batch)
+        finally:
+            if connection is not None:
+                await connection.reset_type_codec("vector", schema="public")
+        return written
+
+    @staticmethod
+    async def _asyncpg_connection(session: AsyncSession):
+        """The asyncpg connection under the session's transaction, or None on another driver"""
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        driver_connection = raw.driver_connection
+        if not hasattr(driver_connection, "copy_records_to_table"):
+            return None
+        return driver_connection
+
+    @staticmethod
+    async def _copy(connection, batch: List[ChunkRow], now: datetime):
+        records = [
+            (uuid.uuid4(), row.content, row.vector, row.file_id, row.ordinal,
+             row.section_id, False, now, now)
+            for row in batch
+        ]
+        await connection.copy_records_to_table(
+            Chunk.__tablename__, records=records, columns=COPY_COLUMNS
+        )
+
+    @staticmethod
+    async def _insert(session: AsyncSession, batch: List[ChunkRow], now: datetime):
+        await session.exec(
+            insert(Chunk).values([
+                {
+                    "id": uuid.uuid4(),
+                    "content": row.content,
+                    "vector": row.vector,
+                    "file_id": row.file_id,
+                    "ordinal": row.ordinal,
+                    "section_id": row.section_id,
+                    "file_deleted": False,
+                    "created_at": now,
+                    "updated_at": now,
+                }
+                for row in batch
+            ])
+        )
+
+
+chunk_writer = ChunkWriter(
+    batch_size=Config.CHUNK_WRITE_BATCH_SIZE, method=Config.CHUNK_WRITE_METHOD
+)
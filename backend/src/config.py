@@ -1,10 +1,67 @@
 from pydantic_settings import BaseSettings, SettingsConfigDict
+from typing import Optional
 
 class Settings(BaseSettings):
     DATABASE_URL:str
     JWT_SECRET_KEY: str
     JWT_SECRET_KEY_REFRESH: str
     JWT_ALGORITHM: str
+    EMBEDDING_MODEL_NAME: str = "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+    EMBEDDING_BACKEND: str = "torch"  # "torch" or "onnx"
+    EMBEDDING_ONNX_DIR: str = "./models/embedding-onnx"
+    EMBEDDING_ONNX_QUANTIZED: bool = True  # use the int8 model with the onnx backend
+    EMBEDDING_MAX_SEQ_LENGTH: int = 128
+    EMBEDDING_BATCH_SIZE: int = 64
+    EMBEDDING_SOCKET_PATH: Optional[str] = None  # embedding sidecar socket, None = in-process model
+    # Encode with an in-process model while the sidecar is down. Keeps /ask and
+    # ingestion up, at the cost of loading the model (1-2 GB RSS) in every
+    # process that hits an outage; disable where memory matters more
+    EMBEDDING_SOCKET_FALLBACK: bool = True
+    EMBEDDING_WARMUP: bool = True  # load the model at startup; disable on auth-only workers
+    EMBEDDING_LOAD_BUDGET_SECONDS: float = 30.0
+    EMBEDDING_BATCH_MAX_WAIT_MS: float = 5.0  # how long /ask waits to coalesce questions
+    EMBEDDING_BATCH_MAX_SIZE: int = 32
+    QUESTION_CACHE_SIZE: int = 2048
+    QUESTION_CACHE_TTL_SECONDS: float = 3600.0
+    RETRIEVAL_CACHE_SIZE: int = 512
+    ANSWER_CACHE_ENABLED: bool = False
+    ANSWER_CACHE_MAX_DISTANCE: float = 0.05  # cosine distance between questions
+    ANSWER_CACHE_TTL_HOURS: float = 24.0
+    RERANK_ENABLED: bool = False
+    RERANK_MODEL_NAME: str = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+    RERANK_TOP_K: int = 5
+    RERANK_BUDGET_MS: float = 300.0
+    CONTEXT_TOKEN_BUDGET: int = 2048  # tokens of retrieved text in the /ask prompt
+    CHAT_MODEL_ID: str = "qwen2:0.5b"  # Ollama model used when a question names none
+    # Fetch the tokenizer of CHAT_MODEL_ID in the background after startup, for
+    # exact token counts; off by default since it downloads from Hugging Face
+    CONTEXT_TOKENIZER_WARMUP: bool = False
+    # Ingestion processes per API process. Each loads its own embedding model
+    # (roughly 1-2 GB RSS for the default model, unless EMBEDDING_SOCKET_PATH
+    # points at the sidecar), and every uvicorn worker starts its own pool.
+    INGEST_WORKERS: int = 2
+    INGEST_WORKER_ENABLED: bool = True  # run the ingestion job loop in this API process
+    INGEST_JOB_MAX_ATTEMPTS: int = 3
+    INGEST_JOB_RETRY_SECONDS: float = 30.0  # first retry delay, doubled on every attempt
+    INGEST_JOB_POLL_SECONDS: float = 2.0
+    INGEST_JOB_LEASE_SECONDS: float = 120.0  # running jobs not refreshed this long are requeued
+    # Characters shared by neighbouring chunks of a section. Whole-document
+    # chunking used 64; sections carry the wider context now, so child chunks
+    # overlap less
+    CHUNK_OVERLAP: int = 32
+    SECTION_SIZE: int = 1536  # characters per parent section, split into 256-char chunks
+    SEARCH_EXPAND_SECTIONS: bool = True  # give the LLM the sections of matching chunks
+    INGEST_BATCH_CHUNKS: int = 256  # chunks embedded and written per batch while a file is parsed
+    INGEST_QUEUE_BATCHES: int = 2  # parsed batches waiting for embedding, bounds memory per file
+    CHUNK_WRITE_METHOD: str = "copy"  # "copy" (binary COPY, asyncpg only) or "insert" (multi-row INSERT)
+    CHUNK_WRITE_BATCH_SIZE: int = 2000  # chunk rows per COPY / INSERT statement
+    EMBEDDING_CACHE_MAX_AGE_DAYS: int = 90
+    HNSW_EF_SEARCH: int = 64
+    IVFFLAT_PROBES: int = 20
+    VECTOR_INDEX_PRECISION: str = "full"  # "full" (vector) or "half" (halfvec) HNSW index
+    VECTOR_METRIC: str = "cosine"  # "cosine" (<=>) or "inner_product" (<#>, needs normalized vectors)
+    EMBEDDING_NORMALIZE: bool = True  # unit-normalize every embedding the provider returns
+    HNSW_ITERATIVE_SCAN: str = "relaxed_order"  # "off", "strict_order" or "relaxed_order" (pgvector >= 0.8)
     model_config = SettingsConfigDict(
         env_file='.env',
         extra='ignore'
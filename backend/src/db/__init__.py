@@ -7,5 +7,9 @@ from src.admin.model import Admin
 from src.file.model import File
 from src.chunk.model import Chunk
 from src.token_blacklist.model import TokenBlacklist
+from src.embedding_cache.model import EmbeddingCache
+from src.answer_cache.model import AnswerCache
+from src.section.model import Section
+from src.ingest_job.model import IngestJob
 
-__all__ = ["User", "Chat", "Chat_history", "Admin", "File", "Chunk", "TokenBlacklist"]
\ No newline at end of file
+__all__ = ["User", "Chat", "Chat_history", "Admin", "File", "Chunk", "TokenBlacklist", "EmbeddingCache", "AnswerCache", "Section", "IngestJob"]
\ No newline at end of file
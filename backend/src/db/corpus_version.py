@@ -0,0 +1,32 @@
+"""
+Corpus version counter, shared by all workers through a Postgres sequence.
+Bumped after every committed change to the searchable chunks (new, retrained,
+restored or deleted files); caches of retrieval results include the version
+in their keys so they never serve results of an older corpus.
+"""
+from sqlmodel import text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+CORPUS_VERSION_SEQUENCE = "corpus_version_seq"
+
+
+async def get_corpus_version(session: AsyncSession) -> int:
+    """
+    Current corpus version (a single-row read of the sequence). A fresh
+    sequence reports last_value 1 before its first nextval, which would be
+    the same version as after the first bump, so it counts as 0.
+    """
+    result = await session.exec(text(
+        f"SELECT CASE WHEN is_called THEN last_value ELSE 0 END FROM {CORPUS_VERSION_SEQUENCE}"
+    ))
+    return result.first()[0]
+
+
+async def bump_corpus_version(session: AsyncSession) -> int:
+    """
+    Move to a new corpus version. Call it after the change is committed:
+    nextval is not transactional, so bumping earlier could let another
+    worker cache the old corpus under the new version.
+    """
+    result = await session.exec(text(f"SELECT nextval('{CORPUS_VERSION_SEQUENCE}')"))
+    return result.first()[0]
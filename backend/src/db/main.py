@@ -1,11 +1,15 @@
 from sqlmodel import create_engine, text, SQLModel
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy import event
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlalchemy.orm import sessionmaker
 from typing import AsyncGenerator
+import logging
 
 from src.config import Config
 
+logger = logging.getLogger(__name__)
+
 engine = AsyncEngine(
     create_engine(
         url=Config.DATABASE_URL,
@@ -13,6 +17,36 @@ engine = AsyncEngine(
     )
 )
 
+
+def _pgvector_version(cursor) -> tuple:
+    """Installed pgvector extension version, e.g. (0, 8, 0); () if not installed"""
+    cursor.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+    row = cursor.fetchone()
+    if row is None:
+        return ()
+    return tuple(int(part) for part in row[0].split(".") if part.isdigit())
+
+
+def set_search_parameters(dbapi_connection, connection_record):
+    """Apply pgvector search parameters once per new pooled connection"""
+    cursor = dbapi_connection.cursor()
+    cursor.execute(f"SET hnsw.ef_search = {int(Config.HNSW_EF_SEARCH)}")
+    cursor.execute(f"SET ivfflat.probes = {int(Config.IVFFLAT_PROBES)}")
+    if Config.HNSW_ITERATIVE_SCAN != "off":
+        # Keep scanning the index when filters (e.g. deleted files) drop candidates;
+        # the setting only exists from pgvector 0.8
+        if _pgvector_version(cursor) >= (0, 8):
+            cursor.execute(f"SET hnsw.iterative_scan = {Config.HNSW_ITERATIVE_SCAN}")
+        else:
+            logger.warning("hnsw.iterative_scan needs pgvector >= 0.8, not setting it")
+    cursor.close()
+    # The asyncpg adapter ran the SETs in an implicit transaction; without a
+    # commit the first rollback (e.g. the pool's reset-on-return) undoes them
+    dbapi_connection.commit()
+
+
+event.listen(engine.sync_engine, "connect", set_search_parameters)
+
 async def init_db():
     async with engine.begin() as conn:
         pass
@@ -3,15 +3,129 @@ Vector search utilities for RAG system optimization
 """
 from sqlmodel import Session, select, text
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import List, Optional
-from ..chunk.model import Chunk
+from sqlalchemy import bindparam, cast, func, literal, or_, true
+from sqlalchemy.dialects.postgresql import ARRAY, REGCONFIG, TEXT
+from pgvector.sqlalchemy import HALFVEC, BIT, VECTOR
+from typing import List, NamedTuple, Optional
+import numpy as np
+import uuid
+from ..chunk.model import Chunk, EMBEDDING_DIMENSION, TEXT_SEARCH_CONFIG
+from ..file.model import File
+from ..section.model import Section
+from ..config import Config
+
+
+class SearchHit(NamedTuple):
+    """
+    Compact search result with only the columns the chat path needs.
+    Much cheaper than a Chunk: no 768-float vector and no relationship loading.
+    """
+    id: uuid.UUID
+    content: str
+    file_id: uuid.UUID
+    distance: float
+    file_name: Optional[str] = None
+    section_id: Optional[uuid.UUID] = None  # set by expand_to_sections; id stays the chunk id
+
+    @property
+    def similarity(self) -> float:
+        return 1 - self.distance
 
 
 class VectorSearch:
     """Optimized vector search operations for RAG system"""
     
-    def __init__(self, session: Session):
+    def __init__(
+        self,
+        session: Session,
+        precision: Optional[str] = None,
+        include_deleted: bool = False,
+        metric: Optional[str] = None,
+    ):
+        """
+        Args:
+            precision: "full" searches the float32 HNSW index, "half" the
+                       halfvec index (query vectors are cast to match).
+                       Defaults to VECTOR_INDEX_PRECISION.
+            include_deleted: Also return chunks of soft-deleted files
+            metric: "cosine" (<=>) or "inner_product" (<#>, only valid for
+                    unit-normalized vectors). Defaults to VECTOR_METRIC.
+                    Distances and thresholds are cosine distances either way.
+        """
         self.session = session
+        self.precision = precision or Config.VECTOR_INDEX_PRECISION
+        self.include_deleted = include_deleted
+        self.metric = metric or Config.VECTOR_METRIC
+        if self.metric == "inner_product" and self.precision == "half":
+            raise ValueError("There is no halfvec inner-product index, use full precision")
+
+    def _filter(self, query, file_ids: Optional[List[str]] = None):
+        """
+        Restrict a query on Chunk to the requested files and, unless
+        include_deleted is set, to files that are not soft-deleted.
+        The flag lives on Chunk, so the HNSW index scan is filtered in place
+        (with hnsw.iterative_scan it keeps scanning until enough rows pass).
+        """
+        if file_ids:
+            query = query.where(Chunk.file_id.in_(file_ids))
+        if not self.include_deleted:
+            query = query.where(Chunk.file_deleted == False)
+        return query
+
+    def _distance(self, query_vector):
+        """
+        Distance expression matching the index for self.precision and
+        self.metric; order by it as is so the index is used
+        """
+        if self.metric == "inner_product":
+            # Negative inner product: -1 (identical) .. 1 for unit vectors
+            return Chunk.vector.max_inner_product(query_vector)
+        if self.precision == "half":
+            halfvec = HALFVEC(EMBEDDING_DIMENSION)
+            return cast(Chunk.vector, halfvec).cosine_distance(cast(query_vector, halfvec))
+        return Chunk.vector.cosine_distance(query_vector)
+
+    def _as_cosine_distance(self, distance):
+        """Cosine distance from a _distance expression (for unit vectors 1 - ip = 1 + <#>)"""
+        if self.metric == "inner_product":
+            return 1 + distance
+        return distance
+
+    def _distance_threshold(self, cosine_distance: float) -> float:
+        """Translate a cosine distance threshold to the scale of _distance"""
+        if self.metric == "inner_product":
+            return cosine_distance - 1
+        return cosine_distance
+
+    @staticmethod
+    def _any_word_tsquery(query_text: str):
+        """
+        OR of the question's lexemes ('a' | 'b' | ...), normalized by the text
+        search configuration. websearch_to_tsquery ANDs every word, and with
+        stopwords kept a natural-language question then matches almost nothing;
+        ts_rank_cd still ranks chunks matching more of the words first.
+        """
+        config = cast(literal(TEXT_SEARCH_CONFIG), REGCONFIG)
+        lexemes = func.unnest(
+            func.tsvector_to_array(func.to_tsvector(config, query_text))
+        ).table_valued("lexeme").render_derived(name="lexemes")
+        # quote_literal keeps lexemes with quotes or operators valid tsquery terms
+        terms = select(
+            func.coalesce(func.string_agg(func.quote_literal(lexemes.c.lexeme), " | "), "")
+        ).scalar_subquery()
+        return func.to_tsquery(config, terms)
+
+    @staticmethod
+    def _hit_columns():
+        """Chunk columns of a SearchHit, before the distance; never the vector"""
+        return Chunk.id, Chunk.content, Chunk.file_id
+
+    @staticmethod
+    def _hamming_distance(query_vector: List[float]):
+        """Hamming distance between binary-quantized vectors, matching idx_chunk_vector_binary_hnsw"""
+        bits = BIT(EMBEDDING_DIMENSION)
+        query_bits = cast(func.binary_quantize(cast(query_vector, VECTOR(EMBEDDING_DIMENSION))), bits)
+        return cast(func.binary_quantize(Chunk.vector), bits).hamming_distance(query_bits)
     
     async def similarity_search_cosine(
         self, 
@@ -19,7 +133,7 @@ class VectorSearch:
         limit: int = 5,
         similarity_threshold: Optional[float] = None,
         file_ids: Optional[List[str]] = None
-    ) -> List[Chunk]:
+    ) -> List[SearchHit]:
         """
         Search for similar chunks using cosine similarity
         
@@ -29,22 +143,23 @@ class VectorSearch:
             similarity_threshold: Minimum similarity score (0-1, higher = more similar)
             file_ids: Optional list of file IDs to restrict search to
         """
-        query = select(Chunk).order_by(Chunk.vector.cosine_distance(query_vector))
-        
-        # Add file filter if specified
-        if file_ids:
-            query = query.where(Chunk.file_id.in_(file_ids))
+        distance = self._distance(query_vector)
+        query = self._filter(
+            select(*self._hit_columns(), self._as_cosine_distance(distance).label("distance")),
+            file_ids,
+        ).order_by(distance)
         
         # Add similarity threshold if specified
         if similarity_threshold is not None:
             # Convert similarity threshold to distance threshold
             # cosine_distance = 1 - cosine_similarity
-            distance_threshold = 1 - similarity_threshold
-            query = query.where(Chunk.vector.cosine_distance(query_vector) <= distance_threshold)
+            distance_threshold = self._distance_threshold(1 - similarity_threshold)
+            query = query.where(distance <= distance_threshold)
         
         query = query.limit(limit)
         result = await self.session.exec(query)
-        return result.all()
+        # relaxed_order iterative scans may return rows slightly out of order
+        return sorted((SearchHit(*row) for row in result.all()), key=lambda hit: hit.distance)
     
     async def similarity_search_tiered(
         self,
@@ -52,12 +167,17 @@ class VectorSearch:
         high_threshold: float = 0.7,
         medium_threshold: float = 0.5,
         max_medium_results: int = 5,
-        file_ids: Optional[List[str]] = None
-    ) -> List[Chunk]:
+        file_ids: Optional[List[str]] = None,
+        include_file_name: bool = False,
+        max_candidates: Optional[int] = None
+    ) -> List[SearchHit]:
         """
         Tiered similarity search for RAG systems:
-        - Returns ALL chunks with similarity > high_threshold 
+        - Returns all chunks with similarity > high_threshold (at most max_candidates)
         - Returns at most max_medium_results chunks with similarity between medium_threshold and high_threshold
+        Both tiers come back from one statement: an index-ordered
+        ORDER BY distance LIMIT max_candidates scan takes the nearest chunks,
+        then the thresholds and a window function split them into tiers.
         
         Args:
             query_vector: The embedding vector to search for
@@ -65,44 +185,300 @@ class VectorSearch:
             medium_threshold: Minimum similarity for medium-priority chunks (default 0.5)
             max_medium_results: Maximum number of medium-priority chunks to return
             file_ids: Optional list of file IDs to restrict search to
+            include_file_name: Also return the source file name (joined in the same query)
+            max_candidates: Nearest chunks taken from the index before the tiers
+                            are applied, defaults to HNSW_EF_SEARCH
+
+        Returns:
+            SearchHits, high tier first, each tier most similar first
         """
-        # Get high similarity chunks (all of them)
+        max_candidates = max_candidates or Config.HNSW_EF_SEARCH
+        if max_candidates > Config.HNSW_EF_SEARCH:
+            # HNSW never returns more rows than ef_search
+            await self.session.exec(text(f"SET LOCAL hnsw.ef_search = {int(max_candidates)}"))
+
+        distance = self._distance(query_vector)
         high_distance_threshold = 1 - high_threshold
-        high_query = select(Chunk).where(
-            Chunk.vector.cosine_distance(query_vector) <= high_distance_threshold
-        ).order_by(Chunk.vector.cosine_distance(query_vector))
-        
-        if file_ids:
-            high_query = high_query.where(Chunk.file_id.in_(file_ids))
-        
-        high_result = await self.session.exec(high_query)
-        high_similarity_chunks = high_result.all()
-        
-        # Get medium similarity chunks (limited number)
         medium_distance_threshold = 1 - medium_threshold
-        high_distance_threshold = 1 - high_threshold
-        
-        medium_query = select(Chunk).where(
-            Chunk.vector.cosine_distance(query_vector) <= medium_distance_threshold,
-            Chunk.vector.cosine_distance(query_vector) > high_distance_threshold
-        ).order_by(Chunk.vector.cosine_distance(query_vector)).limit(max_medium_results)
-        
-        if file_ids:
-            medium_query = medium_query.where(Chunk.file_id.in_(file_ids))
-        
-        medium_result = await self.session.exec(medium_query)
-        medium_similarity_chunks = medium_result.all()
-        
-        # Combine and return
-        return high_similarity_chunks + medium_similarity_chunks
+
+        # Thresholds stay outside the scan, so the HNSW index serves the ORDER BY ... LIMIT
+        candidates = select(
+            Chunk.id.label("id"),
+            Chunk.content.label("content"),
+            Chunk.file_id.label("file_id"),
+            self._as_cosine_distance(distance).label("distance"),
+        )
+        candidates = self._filter(candidates, file_ids).order_by(distance).limit(max_candidates).cte("candidates")
+
+        # Tiers are re-sorted here, so relaxed_order iterative scans are fine
+        is_high = candidates.c.distance <= high_distance_threshold
+        ranked = select(
+            candidates,
+            is_high.label("is_high"),
+            func.row_number().over(
+                partition_by=is_high, order_by=candidates.c.distance
+            ).label("tier_rank"),
+        ).where(candidates.c.distance <= medium_distance_threshold).cte("ranked")
+
+        query = (
+            select(ranked.c.id, ranked.c.content, ranked.c.file_id, ranked.c.distance)
+            .where(or_(ranked.c.is_high, ranked.c.tier_rank <= max_medium_results))
+            .order_by(ranked.c.is_high.desc(), ranked.c.distance)
+        )
+        if include_file_name:
+            query = query.add_columns(File.name).join(File, File.id == ranked.c.file_id)
+        result = await self.session.exec(query)
+        return [SearchHit(*row) for row in result.all()]
     
+    async def similarity_search_binary_tiered(
+        self,
+        query_vector: List[float],
+        high_threshold: float = 0.7,
+        medium_threshold: float = 0.5,
+        max_medium_results: int = 5,
+        limit: int = 20,
+        oversampling: int = 4,
+        rerank: str = "sql",
+        file_ids: Optional[List[str]] = None
+    ) -> List[SearchHit]:
+        """
+        Two-stage tiered search for large corpora:
+        1. Hamming-distance search over binary-quantized vectors fetches
+           limit * oversampling candidates from the small binary index
+        2. Candidates are rescored with exact cosine distance, either in SQL
+           or in NumPy, and the high/medium tiers are applied as in
+           similarity_search_tiered (at most limit chunks in total)
+
+        Args:
+            limit: Maximum number of chunks to return
+            oversampling: Candidates fetched per returned chunk; raise it if
+                          recall drops against similarity_search_tiered
+            rerank: "sql" to rescore in the database, "numpy" to fetch the
+                    candidate vectors and rescore them here
+
+        Returns:
+            SearchHits, high tier first, each tier most similar first
+        """
+        candidate_count = limit * oversampling
+        if candidate_count > Config.HNSW_EF_SEARCH:
+            # HNSW never returns more rows than ef_search
+            await self.session.exec(text(f"SET LOCAL hnsw.ef_search = {int(candidate_count)}"))
+
+        candidates = select(Chunk.id).order_by(self._hamming_distance(query_vector))
+        candidates = self._filter(candidates, file_ids).limit(candidate_count)
+
+        columns = (Chunk.id, Chunk.content, Chunk.file_id)
+        medium_distance_threshold = 1 - medium_threshold
+        if rerank == "sql":
+            distance = Chunk.vector.cosine_distance(query_vector)
+            query = select(*columns, distance.label("distance")).where(
+                Chunk.id.in_(candidates.scalar_subquery()),
+                distance <= medium_distance_threshold,
+            ).order_by(distance)
+            result = await self.session.exec(query)
+            hits = [SearchHit(*row) for row in result.all()]
+        elif rerank == "numpy":
+            result = await self.session.exec(
+                select(*columns, Chunk.vector).where(Chunk.id.in_(candidates.scalar_subquery()))
+            )
+            rows = result.all()
+            if not rows:
+                return []
+            matrix = np.stack([np.asarray(row.vector, dtype=np.float32) for row in rows])
+            query_array = np.asarray(query_vector, dtype=np.float32)
+            similarities = matrix @ query_array / (
+                np.linalg.norm(matrix, axis=1) * np.linalg.norm(query_array) + 1e-12
+            )
+            order = np.argsort(-similarities)
+            hits = [
+                SearchHit(rows[i].id, rows[i].content, rows[i].file_id, float(1 - similarities[i]))
+                for i in order
+                if similarities[i] >= medium_threshold
+            ]
+        else:
+            raise ValueError(f"Unknown rerank mode: {rerank}")
+
+        high = [hit for hit in hits if hit.similarity >= high_threshold]
+        medium = [hit for hit in hits if hit.similarity < high_threshold][:max_medium_results]
+        return (high + medium)[:limit]
+
+    async def similarity_search_hybrid(
+        self,
+        query_vector: List[float],
+        query_text: str,
+        limit: int = 10,
+        candidates: int = 40,
+        rrf_k: int = 60,
+        file_ids: Optional[List[str]] = None,
+        include_file_name: bool = False
+    ) -> List[SearchHit]:
+        """
+        Hybrid search for questions with codes, form numbers or proper nouns
+        that embeddings match poorly. Runs a vector top-k and a full-text top-k
+        over Chunk.content_tsv and fuses them with reciprocal-rank fusion
+        (score = sum of 1 / (rrf_k + rank) over both lists), in one statement.
+
+        Args:
+            query_vector: The embedding of the question
+            query_text: The question itself; chunks matching any of its words are ranked
+            limit: Maximum number of chunks to return
+            candidates: Chunks taken from each list before fusion
+            rrf_k: RRF damping constant, 60 is the usual choice
+
+        Returns:
+            SearchHits ordered by fused score (distance is still the cosine distance)
+        """
+        distance = self._distance(query_vector)
+        vector_top = self._filter(
+            select(Chunk.id.label("id"), distance.label("distance")), file_ids
+        ).order_by(distance).limit(candidates).cte("vector_top")
+        vector_ranked = select(
+            vector_top.c.id,
+            func.row_number().over(order_by=vector_top.c.distance).label("rank"),
+        ).cte("vector_ranked")
+
+        ts_query = self._any_word_tsquery(query_text)
+        text_rank = func.ts_rank_cd(Chunk.content_tsv, ts_query)
+        text_top = self._filter(
+            select(Chunk.id.label("id"), text_rank.label("text_rank"))
+            .where(Chunk.content_tsv.op("@@")(ts_query)),
+            file_ids,
+        ).order_by(text_rank.desc()).limit(candidates).cte("text_top")
+        text_ranked = select(
+            text_top.c.id,
+            func.row_number().over(order_by=text_top.c.text_rank.desc()).label("rank"),
+        ).cte("text_ranked")
+
+        fused_id = func.coalesce(vector_ranked.c.id, text_ranked.c.id)
+        fused_score = (
+            func.coalesce(1.0 / (rrf_k + vector_ranked.c.rank), 0.0)
+            + func.coalesce(1.0 / (rrf_k + text_ranked.c.rank), 0.0)
+        )
+        fused = (
+            select(fused_id.label("id"), fused_score.label("score"))
+            .select_from(vector_ranked.join(text_ranked, vector_ranked.c.id == text_ranked.c.id, full=True))
+            .order_by(fused_score.desc())
+            .limit(limit)
+            .cte("fused")
+        )
+
+        query = (
+            select(Chunk.id, Chunk.content, Chunk.file_id, self._as_cosine_distance(distance).label("distance"))
+            .join(fused, fused.c.id == Chunk.id)
+            .order_by(fused.c.score.desc())
+        )
+        if include_file_name:
+            query = query.add_columns(File.name).join(File, File.id == Chunk.file_id)
+        result = await self.session.exec(query)
+        return [SearchHit(*row) for row in result.all()]
+
+    async def retrieve(
+        self,
+        mode: str,
+        query_vector: List[float],
+        query_text: str
+    ) -> List[SearchHit]:
+        """
+        Context retrieval for the chat endpoint with the defaults of each mode:
+        "tiered" (all chunks above 0.7 similarity plus up to 5 between 0.5 and 0.7),
+        "binary" (the same tiers from the binary-quantized index) or "hybrid"
+        (vector and full-text results fused, for codes and proper nouns)
+        """
+        if mode == "tiered":
+            return await self.similarity_search_tiered(
+                query_vector, high_threshold=0.7, medium_threshold=0.5, max_medium_results=5
+            )
+        if mode == "binary":
+            return await self.similarity_search_binary_tiered(
+                query_vector, high_threshold=0.7, medium_threshold=0.5, max_medium_results=5
+            )
+        if mode == "hybrid":
+            return await self.similarity_search_hybrid(query_vector, query_text, limit=10)
+        raise ValueError(f"Unknown search mode: {mode}")
+
+    async def expand_to_sections(self, hits: List[SearchHit]) -> List[SearchHit]:
+        """
+        Replace the content of chunk hits by the parent sections they were
+        split from, in one query. Hits keep their order (retrieval or rerank
+        order) and their chunk id; section_id is set. Each section appears once,
+        at the position of its first chunk; chunks without a section are kept.
+        """
+        if not hits:
+            return []
+        result = await self.session.exec(
+            select(Chunk.id, Section.id, Section.content)
+            .join(Section, Section.id == Chunk.section_id)
+            .where(Chunk.id.in_([hit.id for hit in hits]))
+        )
+        sections = {chunk_id: (section_id, content) for chunk_id, section_id, content in result.all()}
+
+        expanded, seen = [], set()
+        for hit in hits:
+            if hit.id not in sections:
+                expanded.append(hit)
+                continue
+            section_id, content = sections[hit.id]
+            if section_id not in seen:
+                seen.add(section_id)
+                expanded.append(hit._replace(content=content, section_id=section_id))
+        return expanded
+
+    async def batch_similarity_search(
+        self,
+        query_vectors: List[List[float]],
+        limit: int = 5,
+        similarity_threshold: Optional[float] = None,
+        file_ids: Optional[List[str]] = None
+    ) -> List[List[SearchHit]]:
+        """
+        Top-k cosine search for many query vectors in one round-trip: the
+        vectors are sent as one array, unnested WITH ORDINALITY, and a LATERAL
+        subquery runs an index-ordered top-k for each of them.
+
+        Returns:
+            One list of SearchHits per query vector, in input order
+        """
+        if len(query_vectors) == 0:
+            return []
+        vector_texts = [
+            "[" + ",".join(str(float(x)) for x in vector) + "]" for vector in query_vectors
+        ]
+        queries = func.unnest(
+            bindparam("query_vectors", value=vector_texts, type_=ARRAY(TEXT))
+        ).table_valued("vector_text", with_ordinality="query_index").render_derived(name="queries")
+        query_vector = cast(queries.c.vector_text, VECTOR(EMBEDDING_DIMENSION))
+
+        distance = self._distance(query_vector)
+        top_k = self._filter(
+            select(
+                Chunk.id.label("id"),
+                Chunk.content.label("content"),
+                Chunk.file_id.label("file_id"),
+                self._as_cosine_distance(distance).label("distance"),
+            ),
+            file_ids,
+        ).order_by(distance).limit(limit).lateral("top_k")
+
+        query = select(
+            queries.c.query_index, top_k.c.id, top_k.c.content, top_k.c.file_id, top_k.c.distance
+        ).select_from(queries.join(top_k, true()))
+        if similarity_threshold is not None:
+            query = query.where(top_k.c.distance <= 1 - similarity_threshold)
+        query = query.order_by(queries.c.query_index, top_k.c.distance)
+
+        result = await self.session.exec(query)
+        hits: List[List[SearchHit]] = [[] for _ in query_vectors]
+        for query_index, *row in result.all():
+            hits[query_index - 1].append(SearchHit(*row))
+        return hits
+
     async def similarity_search_l2(
         self, 
         query_vector: List[float], 
         limit: int = 5,
         distance_threshold: Optional[float] = None,
         file_ids: Optional[List[str]] = None
-    ) -> List[Chunk]:
+    ) -> List[SearchHit]:
         """
         Search for similar chunks using L2 (Euclidean) distance
         
@@ -111,82 +487,69 @@ class VectorSearch:
             limit: Maximum number of results to return
             distance_threshold: Maximum L2 distance (lower = more similar)
             file_ids: Optional list of file IDs to restrict search to
+
+        Returns:
+            SearchHits whose distance is the L2 distance (not a cosine distance)
         """
-        query = select(Chunk).order_by(Chunk.vector.l2_distance(query_vector))
-        
-        if file_ids:
-            query = query.where(Chunk.file_id.in_(file_ids))
+        distance = Chunk.vector.l2_distance(query_vector)
+        query = self._filter(
+            select(*self._hit_columns(), distance.label("distance")), file_ids
+        ).order_by(distance)
         
         if distance_threshold is not None:
-            query = query.where(Chunk.vector.l2_distance(query_vector) <= distance_threshold)
+            query = query.where(distance <= distance_threshold)
         
         query = query.limit(limit)
         result = await self.session.exec(query)
-        return result.all()
+        # relaxed_order iterative scans may return rows slightly out of order
+        return sorted((SearchHit(*row) for row in result.all()), key=lambda hit: hit.distance)
     
     async def similarity_search_with_score(
         self, 
         query_vector: List[float], 
         limit: int = 5,
         use_cosine: bool = True
-    ) -> List[tuple[Chunk, float]]:
+    ) -> List[tuple[SearchHit, float]]:
         """
         Search for similar chunks and return with similarity scores
         
         Returns:
-            List of tuples (chunk, similarity_score)
+            List of tuples (hit, similarity_score)
         """
         if use_cosine:
             # For cosine: similarity = 1 - distance
-            query = text("""
-                SELECT *, (1 - (vector <=> :query_vector)) as similarity_score
-                FROM "Chunk"
-                ORDER BY vector <=> :query_vector
-                LIMIT :limit
-            """)
+            distance = self._distance(query_vector)
+            hit_distance = self._as_cosine_distance(distance)
+            score = 1 - hit_distance
         else:
             # For L2: return negative distance as score (higher = better)
-            query = text("""
-                SELECT *, -(vector <-> :query_vector) as similarity_score
-                FROM "Chunk"
-                ORDER BY vector <-> :query_vector
-                LIMIT :limit
-            """)
-        
-        result = await self.session.exec(
-            query, 
-            {
-                "query_vector": query_vector, 
-                "limit": limit
-            }
-        )
-        rows = result.all()
-        chunks_with_scores = []
-        for row in rows:
-            # Convert row to Chunk object (excluding the score)
-            chunk_data = {
-                "id": row.id,
-                "content": row.content,
-                "vector": row.vector,
-                "file_id": row.file_id,
-                "created_at": row.created_at,
-                "updated_at": row.updated_at
-            }
-            chunk = Chunk(**chunk_data)
-            chunks_with_scores.append((chunk, row.similarity_score))
-        
-        return chunks_with_scores
+            distance = Chunk.vector.l2_distance(query_vector)
+            hit_distance = distance
+            score = -distance
+
+        query = self._filter(
+            select(*self._hit_columns(), hit_distance.label("distance"), score.label("similarity_score"))
+        ).order_by(distance).limit(limit)
+        result = await self.session.exec(query)
+        scored = [(SearchHit(*row[:-1]), row.similarity_score) for row in result.all()]
+        # relaxed_order iterative scans may return rows slightly out of order
+        return sorted(scored, key=lambda pair: pair[1], reverse=True)
     
-    async def optimize_search_parameters(self):
+    async def optimize_search_parameters(
+        self,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+    ):
         """
-        Set optimal search parameters for pgvector indexes
-        Call this before performing searches for better performance
+        Override pgvector search parameters for the current transaction only.
+        Not needed for the defaults: HNSW_EF_SEARCH and IVFFLAT_PROBES are
+        applied once per pooled connection (see src.db.main)
         """
         # Optimize for HNSW indexes
-        await self.session.exec(text("SET hnsw.ef_search = 64"))
+        await self.session.exec(text(f"SET LOCAL hnsw.ef_search = {int(ef_search or Config.HNSW_EF_SEARCH)}"))
         
         # Optimize for IVFFlat indexes (if using)
-        await self.session.exec(text("SET ivfflat.probes = 20"))
+        await self.session.exec(text(f"SET LOCAL ivfflat.probes = {int(probes or Config.IVFFLAT_PROBES)}"))
     
     async def get_index_stats(self) -> dict:
         """Get statistics about vector indexes for monitoring performance"""
@@ -0,0 +1,24 @@
+from sqlmodel import Column, Field, SQLModel
+import sqlalchemy.dialects.postgresql as pg
+from pgvector.sqlalchemy import Vector
+from datetime import datetime
+
+
+class EmbeddingCache(SQLModel, table=True):
+    """
+    Embeddings keyed by (model name, sha256 of the chunk text).
+    Ingestion looks chunks up here before calling the model, so retrains and
+    boilerplate shared between files are not embedded again.
+    """
+    __tablename__ = "Embedding_cache"
+
+    model_name: str = Field(sa_column=Column(pg.VARCHAR, primary_key=True))
+    content_hash: str = Field(sa_column=Column(pg.VARCHAR(64), primary_key=True))
+    vector: list[float] = Field(sa_column=Column(Vector(768), nullable=False))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    last_used_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, index=True)
+    )
+
+    def __repr__(self):
+        return f"<EmbeddingCache {self.model_name} - {self.content_hash}>"
@@ -0,0 +1,90 @@
+from sqlmodel import select, update, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from datetime import datetime, timedelta
+from hashlib import sha256
+from typing import Dict, Iterable
+import numpy as np
+
+from .model import EmbeddingCache
+
+# Keep IN (...) lists and multi-row inserts well below the 32767 bind parameter limit
+BATCH_SIZE = 1000
+
+
+def content_hash(text: str) -> str:
+    return sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCacheService:
+    """Service for reading and filling the persistent embedding cache"""
+
+    async def get_many(
+        self, model_name: str, hashes: Iterable[str], session: AsyncSession
+    ) -> Dict[str, np.ndarray]:
+        """Return cached vectors by content hash and mark them as recently used"""
+        hashes = list(hashes)
+        found: Dict[str, np.ndarray] = {}
+        now = datetime.now()
+        for start in range(0, len(hashes), BATCH_SIZE):
+            batch = hashes[start:start + BATCH_SIZE]
+            statement = select(EmbeddingCache.content_hash, EmbeddingCache.vector).where(
+                EmbeddingCache.model_name == model_name,
+                EmbeddingCache.content_hash.in_(batch),
+            )
+            result = await session.exec(statement)
+            rows = result.all()
+            found.update({row.content_hash: row.vector for row in rows})
+            if rows:
+                # Skip rows another ingest is touching: the timestamp only needs
+                # to be roughly right, and waiting on them could deadlock
+                touched = (
+                    select(EmbeddingCache.content_hash)
+                    .where(
+                        EmbeddingCache.model_name == model_name,
+                        EmbeddingCache.content_hash.in_([row.content_hash for row in rows]),
+                    )
+                    .order_by(EmbeddingCache.content_hash)
+                    .with_for_update(skip_locked=True)
+                )
+                await session.exec(
+                    update(EmbeddingCache)
+                    .where(
+                        EmbeddingCache.model_name == model_name,
+                        EmbeddingCache.content_hash.in_(touched),
+                    )
+                    .values(last_used_at=now)
+                )
+        return found
+
+    async def put_many(
+        self, model_name: str, vectors: Dict[str, np.ndarray], session: AsyncSession
+    ) -> None:
+        """Insert vectors by content hash, ignoring hashes that are already cached"""
+        # Sorted so concurrent ingests insert shared hashes in the same order
+        items = sorted(vectors.items())
+        now = datetime.now()
+        for start in range(0, len(items), BATCH_SIZE):
+            batch = items[start:start + BATCH_SIZE]
+            statement = insert(EmbeddingCache).values(
+                [
+                    {
+                        "model_name": model_name,
+                        "content_hash": hash,
+                        "vector": vector,
+                        "created_at": now,
+                        "last_used_at": now,
+                    }
+                    for hash, vector in batch
+                ]
+            ).on_conflict_do_nothing()
+            await session.exec(statement)
+
+    async def evict_older_than(self, max_age: timedelta, session: AsyncSession) -> int:
+        """Remove entries not used within max_age and return how many were removed"""
+        statement = delete(EmbeddingCache).where(
+            EmbeddingCache.last_used_at < datetime.now() - max_age
+        )
+        result = await session.exec(statement)
+        await session.commit()
+        return result.rowcount
@@ -1,8 +1,18 @@
-from fastapi import UploadFile, HTTPException
+from fastapi import UploadFile, HTTPException, Request
+from fastapi.responses import JSONResponse
 from typing import List
 import os
 
 ALLOWED_EXTENSIONS = {".txt", ".pdf", ".docx", ".xls", ".xlsx"}
+MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB limit
+MAX_UPLOAD_SIZE = 200 * 1024 * 1024  # whole upload request, all files together
+
+
+def file_too_large(filename: str) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"File {filename} exceeds the {MAX_FILE_SIZE // (1024 * 1024)}MB limit",
+    )
 
 
 def validate_file(files: List[UploadFile]) -> List[UploadFile]:
@@ -13,4 +23,25 @@ def validate_file(files: List[UploadFile]) -> List[UploadFile]:
             raise HTTPException(
                 status_code=400, detail=f"File extension {ext} not allowed"
             )
+        # Starlette has already spooled the body by now, so this only saves
+        # staging the file; the early guard is reject_oversized_upload
+        if file.size is not None and file.size > MAX_FILE_SIZE:
+            raise file_too_large(file.filename)
     return files
+
+
+async def reject_oversized_upload(request: Request, call_next):
+    """
+    HTTP middleware: refuse an upload from its Content-Length header, before
+    Starlette reads and spools the multipart body to disk.
+    """
+    if request.method == "POST" and request.url.path.endswith("/file/upload"):
+        content_length = request.headers.get("content-length")
+        if content_length and content_length.isdigit() and int(content_length) > MAX_UPLOAD_SIZE:
+            return JSONResponse(
+                status_code=413,
+                content={
+                    "detail": f"Upload exceeds the {MAX_UPLOAD_SIZE // (1024 * 1024)}MB limit"
+                },
+            )
+    return await call_next(request)
@@ -5,36 +5,48 @@ from fastapi import (
     HTTPException,
     status,
     UploadFile,
-    BackgroundTasks,
     WebSocket,
     WebSocketDisconnect,
     Query,
     Form,
 )
-from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from fastapi.responses import FileResponse
-from src.db.main import get_session
+from src.db.main import get_session, engine
 from sqlmodel.ext.asyncio.session import AsyncSession
-from .dependency import validate_file
+from .dependency import validate_file, file_too_large, MAX_FILE_SIZE
 from src.auth.dependency import AccessTokenBearerAdmin
 import os
 import asyncio
+import aiofiles
 import mimetypes
 from src.file.model import File
-from sqlmodel import select
+from src.chunk.model import Chunk
+from sqlmodel import select, update
 from src.shared.schema import FileSchemaWithAdmin
+from src.file.schema import BatchSearchSchema, BatchSearchResultSchema, BatchSearchHitSchema, UploadJobsSchema
+from src.file.utils import vector_embedding_chunks
+from src.db.vector_search import VectorSearch
 from typing import List, Optional
 import uuid
-from src.file.service import process_files, FileInfoList
+from src.file.worker_pool import ingest_pool
+from src.ingest_job.model import IngestJob, JOB_FAILED, FINISHED_STATUSES
+from src.ingest_job.service import ingest_job_service
+from src.ingest_job.worker import IngestWorker
+from src.db.corpus_version import bump_corpus_version
 from src.config import Config
 import json
+import logging
 from src.file.manager import WebSocketManager
 
-MAX_FILE_SIZE = 10 * 1024 * 1024  # 10MB limit
+UPLOAD_BLOCK_SIZE = 1024 * 1024  # uploads are streamed to disk 1MB at a time
 UPLOAD_DIR = os.path.expanduser("./uploads")
 os.makedirs(UPLOAD_DIR, exist_ok=True)  # Create directory if it doesn't exist
+# Uploads wait here until ingestion commits them and moves them into UPLOAD_DIR
+STAGING_DIR = os.path.join(UPLOAD_DIR, ".staging")
+os.makedirs(STAGING_DIR, exist_ok=True)
 
 
+logger = logging.getLogger(__name__)
 file_router = APIRouter()
 websocket_manager = WebSocketManager()
 
@@ -51,84 +63,48 @@ async def websocket_endpoint(websocket: WebSocket, admin_id: str = Query(None)):
         websocket_manager.disconnect(websocket, admin_id)
 
 
-async def process_files_in_background(
-    files_info_list: FileInfoList, 
-    admin_id: str, 
-    database_url: str, 
-    upload_id: str,
-    retrain_file_ids: Optional[List[Optional[str]]] = None
-):
+async def broadcast_upload_result(jobs: List[IngestJob]):
     """
-    Hàm chạy trong background để xử lý files mà không làm nghẽn API
-    Supports both new file uploads and retraining existing files
-    
-    Args:
-        retrain_file_ids: Array of file IDs (strings) where each index corresponds to files array.
-                         If None at an index, treat as new file. If UUID string, retrain that file.
+    Called by the ingest worker once every job of an upload has finished
+    Notifies the uploader via WebSocket, in the format the frontend expects
     """
-    import time
-
-    try:
-        print(f"Starting background processing for {len(files_info_list)} files...")
-        if retrain_file_ids:
-            retrain_count = sum(1 for fid in retrain_file_ids if fid is not None)
-            print(f"Retraining {retrain_count} existing files...")
-        start_time = time.time()
-
-        # Sử dụng ProcessPoolExecutor trong background task
-        # with ProcessPoolExecutor() as executor:
-        with ThreadPoolExecutor() as executor:
-            loop = asyncio.get_event_loop()
-
-            # Chạy process_files trong executor with retrain file IDs
-            result = await loop.run_in_executor(
-                executor, process_files, files_info_list, admin_id, database_url, retrain_file_ids
-            )
-
-        serialized_result = [
-            {
-                "filename": item["filename"],
-                "status": item["status"],
-                "file_id": str(item["file_id"]) if "file_id" in item else None,
-                "is_retrain": item.get("is_retrain", False),
-                "original_file_id": str(item["original_file_id"]) if "original_file_id" in item else None,
-            }
-            for item in result
-            if item["status"]
-        ]
-
-        end_time = time.time()
-        duration = end_time - start_time
-
-        print(f"Background file processing completed in {duration:.2f} seconds")
-        print(f"Processing result: {serialized_result}")
-
-        # Broadcast processing result via WebSocket
-        # status_list = [item["status"] for item in result]
-        await websocket_manager.broadcast(
-            admin_id,
-            {
-                "event": "processing_complete",
-                "data": serialized_result,
-                "uploadId": upload_id,
-            },
-        )
+    admin_id = str(jobs[0].uploaded_by)
+    upload_id = str(jobs[0].upload_id)
+    serialized_result = [
+        {
+            "filename": job.filename,
+            "status": job.result_status or job.status,
+            "file_id": str(job.file_id) if job.file_id else None,
+            "is_retrain": job.result_status == "retrained",
+            "original_file_id": str(job.retrain_file_id) if job.result_status == "retrained" else None,
+            "error": job.error if job.status == JOB_FAILED else None,
+        }
+        for job in jobs
+    ]
+    logger.info(f"Upload {upload_id} finished: {serialized_result}")
+    await websocket_manager.broadcast(
+        admin_id,
+        {
+            "event": "processing_complete",
+            "data": serialized_result,
+            "uploadId": upload_id,
+        },
+    )
 
-        return result
 
-    except Exception as e:
-        print(f"Error in background file processing: {str(e)}")
-        # Broadcast error via WebSocket
-        await websocket_manager.broadcast(
-            admin_id,
-            {"event": "processing_error", "error": str(e), "uploadId": upload_id},
-        )
-        return {"error": str(e)}
+# Claims queued upload jobs and runs them on the ingestion process pool
+ingest_worker = IngestWorker(
+    ingest_pool,
+    ingest_job_service,
+    engine,
+    Config.DATABASE_URL,
+    on_upload_finished=broadcast_upload_result,
+    poll_seconds=Config.INGEST_JOB_POLL_SECONDS,
+)
 
 
 @file_router.post("/upload", status_code=status.HTTP_202_ACCEPTED)
 async def upload_files(
-    background_tasks: BackgroundTasks,
     files: List[UploadFile] = Depends(validate_file),
     admin_detail: dict = Depends(AccessTokenBearerAdmin),
     retrain_file_ids: Optional[str] = Form(None),  # JSON string array of file IDs
@@ -198,13 +174,30 @@ async def upload_files(
         # only get the filename, not the full path
         safe_filename = os.path.basename(safe_filepath)
 
-        content = await file.read()
-        hash = sha256(content).hexdigest()
         media_type = (
             mimetypes.guess_type(file.filename)[0] or "application/octet-stream"
         )
         extension = os.path.splitext(file.filename)[1].lower()
 
+        # Stream to the staging file in fixed-size blocks, hashing on the way;
+        # the whole file is never in memory and workers only get the path
+        staged_path = os.path.join(STAGING_DIR, f"{uuid.uuid4().hex}{extension}")
+        hasher = sha256()
+        size = 0
+        try:
+            async with aiofiles.open(staged_path, "wb") as f:
+                while block := await file.read(UPLOAD_BLOCK_SIZE):
+                    size += len(block)
+                    if size > MAX_FILE_SIZE:
+                        raise file_too_large(file.filename)
+                    hasher.update(block)
+                    await f.write(block)
+        except BaseException:
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
+            raise
+        hash = hasher.hexdigest()
+
         # Check if this file is for retraining based on index
         retrain_file_id = None
         if retrain_ids_array and index < len(retrain_ids_array):
@@ -214,7 +207,7 @@ async def upload_files(
             "filename": safe_filename,
             "full_path": full_path,
             "extension": extension,
-            "content": content,
+            "staged_path": staged_path,
             "media_type": media_type,
             "hash": hash,
             "upload_index": index,
@@ -222,19 +215,28 @@ async def upload_files(
         }
 
     get_file_info_tasks = [get_file_info(file, i) for i, file in enumerate(files)]
-    files_info_list = await asyncio.gather(*get_file_info_tasks)
+    results = await asyncio.gather(*get_file_info_tasks, return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        # One rejected file rejects the upload; drop what was already staged
+        for result in results:
+            if not isinstance(result, BaseException) and os.path.exists(result["staged_path"]):
+                os.remove(result["staged_path"])
+        raise errors[0]
+    files_info_list = results
 
     admin_id = admin_detail["data"]["id"]
     upload_id = str(uuid.uuid4())
-    # Thêm task vào background tasks để xử lý bất đồng bộ
-    background_tasks.add_task(
-        process_files_in_background,
-        files_info_list,
-        admin_id,
-        Config.DATABASE_URL,
-        upload_id,
-        retrain_ids_array,
-    )
+    # Jobs survive restarts; progress is at GET /jobs/{upload_id}
+    try:
+        await ingest_job_service.enqueue(files_info_list, admin_id, upload_id, session)
+    except BaseException:
+        # No job will ever pick these up
+        for file_info in files_info_list:
+            if os.path.exists(file_info["staged_path"]):
+                os.remove(file_info["staged_path"])
+        raise
+    ingest_worker.notify()
 
     response_message = "Files are being processed in the background. You will be notified upon completion."
     if retrain_ids_array:
@@ -249,6 +251,67 @@ async def upload_files(
     }
 
 
+@file_router.get("/jobs/{upload_id}", response_model=UploadJobsSchema)
+async def get_upload_jobs(
+    upload_id: uuid.UUID,
+    admin_detail: dict = Depends(AccessTokenBearerAdmin),
+    session: AsyncSession = Depends(get_session),
+):
+    """Ingestion status of every file of an upload"""
+    jobs = await ingest_job_service.get_upload_jobs(
+        upload_id, session, uploaded_by=admin_detail["data"]["id"]
+    )
+    if not jobs:
+        raise HTTPException(status_code=404, detail="Upload not found")
+
+    counts = {}
+    for job in jobs:
+        counts[job.status] = counts.get(job.status, 0) + 1
+    return UploadJobsSchema(
+        upload_id=upload_id,
+        finished=all(job.status in FINISHED_STATUSES for job in jobs),
+        counts=counts,
+        jobs=jobs,
+    )
+
+
+@file_router.post("/search/batch", response_model=List[BatchSearchResultSchema])
+async def batch_search(
+    request: BatchSearchSchema,
+    session: AsyncSession = Depends(get_session),
+    admin_detail: dict = Depends(AccessTokenBearerAdmin),
+):
+    """
+    Run a list of questions through retrieval, e.g. to validate a new document set:
+    the questions are embedded in one batch and searched in one query.
+    """
+    try:
+        query_vectors = await asyncio.to_thread(vector_embedding_chunks, request.questions)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to embed questions: {str(e)}")
+
+    results = await VectorSearch(session).batch_similarity_search(
+        query_vectors,
+        limit=request.limit,
+        similarity_threshold=request.similarity_threshold,
+    )
+    return [
+        BatchSearchResultSchema(
+            question=question,
+            hits=[
+                BatchSearchHitSchema(
+                    chunk_id=hit.id,
+                    file_id=hit.file_id,
+                    content=hit.content,
+                    score=hit.similarity,
+                )
+                for hit in hits
+            ],
+        )
+        for question, hits in zip(request.questions, results)
+    ]
+
+
 @file_router.get("/", response_model=List[FileSchemaWithAdmin])
 async def list_files(
     session: AsyncSession = Depends(get_session),
@@ -303,10 +366,14 @@ async def soft_delete_file(
     #         status_code=403, detail="You do not have permission to delete this file"
     #     )
 
-    # Soft delete by setting deleted flag
+    # Soft delete by setting deleted flag, on the file and on its chunks
     file_metadata.deleted = True
     session.add(file_metadata)
+    await session.exec(
+        update(Chunk).where(Chunk.file_id == file_id).values(file_deleted=True)
+    )
     await session.commit()
+    await bump_corpus_version(session)
 
     return {"message": "File soft deleted successfully"}
 
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
 import uuid
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class FileSchema(BaseModel):
     id: uuid.UUID
@@ -10,4 +10,49 @@ class FileSchema(BaseModel):
     type: str
     uploaded_by: uuid.UUID
     created_at: datetime
-    updated_at: datetime
\ No newline at end of file
+    updated_at: datetime
+
+
+class BatchSearchSchema(BaseModel):
+    """Request model for running many questions through retrieval at once."""
+    questions: List[str] = Field(min_length=1, max_length=1000)
+    limit: int = Field(default=5, ge=1, le=50)
+    similarity_threshold: Optional[float] = Field(default=None, ge=0, le=1)
+
+
+class BatchSearchHitSchema(BaseModel):
+    chunk_id: uuid.UUID
+    file_id: uuid.UUID
+    content: str
+    score: float
+
+
+class BatchSearchResultSchema(BaseModel):
+    question: str
+    hits: List[BatchSearchHitSchema]
+
+
+class IngestJobSchema(BaseModel):
+    id: uuid.UUID
+    upload_index: int
+    filename: str
+    status: str
+    attempts: int
+    next_attempt_at: Optional[datetime] = None
+    error: Optional[str] = None
+    result_status: Optional[str] = None
+    file_id: Optional[uuid.UUID] = None
+    created_at: datetime
+    updated_at: datetime
+    finished_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class UploadJobsSchema(BaseModel):
+    """Response model for the ingestion status of one upload."""
+    upload_id: uuid.UUID
+    finished: bool
+    counts: Dict[str, int]  # jobs per status
+    jobs: List[IngestJobSchema]
@@ -1,305 +1,445 @@
-from typing import List, TypedDict, Optional
-from sqlmodel.ext.asyncio.session import AsyncSession
-from sqlmodel import create_engine, select
-from sqlalchemy.ext.asyncio import AsyncEngine
-from sqlalchemy.orm import sessionmaker
+from typing import List, TypedDict, Optional, NotRequired
+from sqlmodel import select, delete, update
 from src.file.model import File
 import asyncio
-import aiofiles
 import os
+import shutil
 import logging
 from src.chunk.model import Chunk
+from src.chunk.service import ChunkRow, chunk_writer
+from src.section.model import Section
 from src.file.utils import (
     read_docx_file,
-    read_pdf_file,
+    iter_pdf_pages,
     read_excel_file,
     read_txt_file,
-    chunk_text,
+    split_sections,
+    iter_sections,
     vector_embedding_chunks,
 )
+from src.embedding_cache.service import EmbeddingCacheService, content_hash
+from src.db.corpus_version import bump_corpus_version
+from src.ingest_job.model import JOB_EMBEDDING, JOB_INSERTING
+from src.ingest_job.service import ingest_job_service
+from src.shared.SentenceTransformer import embedding_provider
+from src.config import Config
+from datetime import timedelta
+import numpy as np
 import secrets
 import uuid
 
 logger = logging.getLogger(__name__)
+embedding_cache_service = EmbeddingCacheService()
+
+# Results of process_files_async that change what retrieval can return
+CORPUS_CHANGING_STATUSES = ("success", "retrained", "restored")
 
 
 class FileInfo(TypedDict):
     filename: str
     full_path: str
     extension: str
-    content: bytes
+    staged_path: str  # upload written to disk by the API; moved to full_path once committed
     media_type: str
     hash: str
     upload_index: int
     retrain_file_id: Optional[str]  # UUID string of existing file to retrain, or None for new file
+    job_id: NotRequired[str]  # set when the file comes from the ingestion job queue
 
 
 # Kiểu dữ liệu cho array của FileInfo
 FileInfoList = List[FileInfo]
 
 
-def process_files(
-    files: FileInfoList,
-    uploaded_by,
-    DATABASE_URL: str,
-    retrain_file_ids: Optional[List[Optional[str]]] = None,
-):
+def _move_into_place(staged_path: str, full_path: str):
+    """Move a staged upload to its final path in the upload directory"""
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    shutil.move(staged_path, full_path)
+
+
+async def process_files_async(files: FileInfoList, uploaded_by, session_maker) -> list:
     """
-    Hàm chạy trong process riêng để xử lý files
-    Trả về trạng thái để process chính gửi thông báo WebSocket
-    Supports both new file uploads and retraining existing files
-    
-    Args:
-        retrain_file_ids: Array of file ID strings where each index corresponds to files array.
-                         If None at an index, treat as new file. If UUID string, retrain that file.
+    Process files with an existing session factory and return one result
+    dict per file (status "failed" with the error when processing failed).
+    Ingestion pool workers call this with one file at a time, reusing their
+    engine and event loop.
     """
+    async def _process_file(file: FileInfo):
+        async with session_maker() as session:
+            try:
+                filename = file["filename"]
+                full_path = file["full_path"]
+                extension = file["extension"]
+                media_type = file["media_type"]
+                hash = file["hash"]
+                staged_path = file["staged_path"]
+                retrain_file_id = file.get("retrain_file_id")
+
+                # Check if this is a retrain operation
+                if retrain_file_id:
+                    result = await _retrain_existing_file(
+                        session, file, retrain_file_id, uploaded_by
+                    )
+                else:
+                    result = await _process_new_file(
+                        session, file, uploaded_by
+                    )
+
+            except Exception as e:
+                logger.error(f"Failed to process {filename}: {str(e)}")
+                await session.rollback()
+
+                # A queued job keeps its staged upload for the next attempt
+                if not file.get("job_id") and os.path.exists(staged_path):
+                    os.remove(staged_path)
+                return {
+                    "filename": filename,
+                    "status": "failed",
+                    "error": str(e),
+                }
+
+            # Still staged if the file already existed or was restored
+            if os.path.exists(staged_path):
+                os.remove(staged_path)
 
-    engine = AsyncEngine(create_engine(url=DATABASE_URL, echo=True))
-    session_maker = sessionmaker(
-        bind=engine, class_=AsyncSession, expire_on_commit=False
-    )
+            if result["status"] in CORPUS_CHANGING_STATUSES:
+                # After the commit: cached retrievals of the old corpus stop matching
+                await bump_corpus_version(session)
+            return result
 
-    async def _process():
-        async def _process_file(file: FileInfo):
+    async def _set_job_status(file: FileInfo, status: str):
+        """Record the ingestion stage on the file's job, if it came from the job queue"""
+        if file.get("job_id"):
             async with session_maker() as session:
-                try:
-                    filename = file["filename"]
-                    full_path = file["full_path"]
-                    extension = file["extension"]
-                    media_type = file["media_type"]
-                    hash = file["hash"]
-                    content = file["content"]
-                    retrain_file_id = file.get("retrain_file_id")
-
-                    # Check if this is a retrain operation
-                    if retrain_file_id:
-                        return await _retrain_existing_file(
-                            session, file, retrain_file_id, uploaded_by
-                        )
-                    else:
-                        return await _process_new_file(
-                            session, file, uploaded_by
-                        )
-
-                except Exception as e:
-                    logger.error(f"Failed to process {filename}: {str(e)}")
-                    await session.rollback()
-                    if os.path.exists(full_path):
-                        os.remove(full_path)
-
-                    return {
-                        "filename": filename,
-                        "status": "failed",
-                        "error": str(e),
-                    }
-
-        async def _retrain_existing_file(session, file: FileInfo, retrain_file_id: str, uploaded_by):
-            """Handle retraining of an existing file"""
-            filename = file["filename"]
-            full_path = file["full_path"]
-            extension = file["extension"]
-            media_type = file["media_type"]
-            hash = file["hash"]
-            content = file["content"]
-            
-            # Get the existing file to retrain
-            target_file_id = uuid.UUID(retrain_file_id)
-            select_stmt = select(File).where(File.id == target_file_id)
-            existing_file = await session.exec(select_stmt)
-            existing_file = existing_file.first()
-            
-            if not existing_file:
-                raise Exception(f"Target file for retraining not found: {target_file_id}")
-            
-            # Delete old chunks associated with this file
-            delete_chunks_stmt = select(Chunk).where(Chunk.file_id == target_file_id)
-            old_chunks = await session.exec(delete_chunks_stmt)
-            for chunk in old_chunks:
-                await session.delete(chunk)
-            
-            # Save the new file content (replace the old file)
-            old_file_path = existing_file.link
-            if os.path.exists(old_file_path):
-                os.remove(old_file_path)  # Remove old physical file
-            
-            # Create new file path for the retrained file
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            async with aiofiles.open(full_path, "wb") as f:
-                await f.write(content)
-            
-            # Update file metadata
-            existing_file.name = filename
-            existing_file.link = full_path
-            existing_file.type = extension
-            existing_file.media_type = media_type
-            existing_file.hash = hash
-            existing_file.uploaded_by = uploaded_by
-            existing_file.deleted = False
-            
-            # Process and generate new chunks and embeddings
-            chunks = await _extract_text_and_chunk(full_path, extension, filename)
-            embeddings = vector_embedding_chunks(chunks)
-            
-            if len(chunks) != len(embeddings):
-                raise Exception(f"Mismatch between chunks and embeddings for {filename}")
-            
-            # Add new chunks
-            for chunk_content, embedding in zip(chunks, embeddings):
-                chunk = Chunk(
-                    content=chunk_content,
-                    vector=embedding.tolist(),
-                    file_id=existing_file.id,
+                await ingest_job_service.set_status(file["job_id"], status, session)
+
+    async def _retrain_existing_file(session, file: FileInfo, retrain_file_id: str, uploaded_by):
+        """Handle retraining of an existing file"""
+        filename = file["filename"]
+        full_path = file["full_path"]
+        extension = file["extension"]
+        media_type = file["media_type"]
+        hash = file["hash"]
+        staged_path = file["staged_path"]
+        
+        # Get the existing file to retrain
+        target_file_id = uuid.UUID(retrain_file_id)
+        select_stmt = select(File).where(File.id == target_file_id)
+        existing_file = await session.exec(select_stmt)
+        existing_file = existing_file.first()
+        
+        if not existing_file:
+            raise Exception(f"Target file for retraining not found: {target_file_id}")
+        
+        # Keep the old embeddings so unchanged chunks are not embedded again,
+        # then delete old chunks associated with this file
+        old_chunks_stmt = select(Chunk.content, Chunk.vector).where(
+            Chunk.file_id == target_file_id
+        )
+        old_chunks = await session.exec(old_chunks_stmt)
+        known_vectors = {
+            content_hash(row.content): row.vector for row in old_chunks.all()
+        }
+        await session.exec(delete(Chunk).where(Chunk.file_id == target_file_id))
+        await session.exec(delete(Section).where(Section.file_id == target_file_id))
+        
+        old_file_path = existing_file.link
+        
+        # Update file metadata
+        existing_file.name = filename
+        existing_file.link = full_path
+        existing_file.type = extension
+        existing_file.media_type = media_type
+        existing_file.hash = hash
+        existing_file.uploaded_by = uploaded_by
+        existing_file.deleted = False
+        
+        # Process and generate new chunks and embeddings, then add them
+        sections = await _extract_text_and_chunk(staged_path, extension, filename)
+        await _ingest_sections(session, file, existing_file.id, sections, known_vectors)
+        
+        await session.commit()
+        
+        # Replace the old physical file only once the new version is committed
+        if old_file_path != full_path and os.path.exists(old_file_path):
+            os.remove(old_file_path)
+        _move_into_place(staged_path, full_path)
+        
+        return {
+            "filename": filename,
+            "status": "retrained",
+            "file_id": existing_file.id,
+            "is_retrain": True,
+            "original_file_id": target_file_id,
+        }
+
+    async def _process_new_file(session, file: FileInfo, uploaded_by):
+        """Handle processing of a new file (existing logic)"""
+        filename = file["filename"]
+        full_path = file["full_path"]
+        extension = file["extension"]
+        media_type = file["media_type"]
+        hash = file["hash"]
+        staged_path = file["staged_path"]
+
+        # chech if file already exists
+        select_stmt = select(File).where(File.hash == hash)
+        existing_file = await session.exec(select_stmt)
+        existing_file = existing_file.first()
+        if existing_file:
+            if existing_file.deleted:
+                # Restore deleted file
+                existing_file.deleted = False
+                existing_file.uploaded_by = uploaded_by
+                await session.exec(
+                    update(Chunk)
+                    .where(Chunk.file_id == existing_file.id)
+                    .values(file_deleted=False)
                 )
-                session.add(chunk)
-            
-            await session.commit()
-            
-            return {
-                "filename": filename,
-                "status": "retrained",
-                "file_id": existing_file.id,
-                "is_retrain": True,
-                "original_file_id": target_file_id,
-            }
-
-        async def _process_new_file(session, file: FileInfo, uploaded_by):
-            """Handle processing of a new file (existing logic)"""
-            filename = file["filename"]
-            full_path = file["full_path"]
-            extension = file["extension"]
-            media_type = file["media_type"]
-            hash = file["hash"]
-            content = file["content"]
-
-            # chech if file already exists
-            select_stmt = select(File).where(File.hash == hash)
-            existing_file = await session.exec(select_stmt)
-            existing_file = existing_file.first()
-            if existing_file:
-                if existing_file.deleted:
-                    # Restore deleted file
-                    existing_file.deleted = False
-                    existing_file.uploaded_by = uploaded_by
-                    await session.commit()
-                    return {
-                        "filename": filename,
-                        "status": "restored",
-                        "file_id": existing_file.id,
-                    }
-                else:
-                    # File already exists and is not deleted
-                    return {
-                        "filename": filename,
-                        "status": "exists",
-                        "file_id": existing_file.id,
-                    }
-                    
-            # allow to upload file with existing name -> need to change full path to save 
-            # if there is an existing file with the same name -> change full path
-            select_stmt = select(File).where(File.name == filename)
-            existing_file = await session.exec(select_stmt)
-            existing_file = existing_file.first()
-            if existing_file:
-                # Generate random string-based unique filename
-                base_path = full_path.rsplit(extension, 1)[0]  # Remove extension
-                max_attempts = 10  # Prevent infinite loop in rare collision cases
-                for attempt in range(max_attempts):
-                    # Generate 6-character random string (alphanumeric)
-                    random_suffix = secrets.token_urlsafe(4)[:6]  # Gets ~6 chars
-                    slug_path = f"{base_path}-{random_suffix}{extension}"
-                    
-                    # Check if this path already exists in database
-                    check_stmt = select(File).where(File.link == slug_path)
-                    path_exists = await session.exec(check_stmt)
-                    if not path_exists.first() and not os.path.exists(slug_path):
-                        full_path = slug_path
-                        break
-                else:
-                    # Fallback if all attempts failed (extremely unlikely)
-                    import time
-                    timestamp_suffix = str(int(time.time()))[-6:]
-                    full_path = f"{base_path}-{timestamp_suffix}{extension}"
-
-            # save metadata
-            file_metadata = File(
-                name=filename,
-                link=full_path,
-                type=extension,
-                media_type=media_type,
-                hash=hash,
-                uploaded_by=uploaded_by,
-                chunks=[],
+                await session.commit()
+                return {
+                    "filename": filename,
+                    "status": "restored",
+                    "file_id": existing_file.id,
+                }
+            else:
+                # File already exists and is not deleted
+                return {
+                    "filename": filename,
+                    "status": "exists",
+                    "file_id": existing_file.id,
+                }
+                
+        # allow to upload file with existing name -> need to change full path to save 
+        # if there is an existing file with the same name -> change full path
+        select_stmt = select(File).where(File.name == filename)
+        existing_file = await session.exec(select_stmt)
+        existing_file = existing_file.first()
+        if existing_file:
+            # Generate random string-based unique filename
+            base_path = full_path.rsplit(extension, 1)[0]  # Remove extension
+            max_attempts = 10  # Prevent infinite loop in rare collision cases
+            for attempt in range(max_attempts):
+                # Generate 6-character random string (alphanumeric)
+                random_suffix = secrets.token_urlsafe(4)[:6]  # Gets ~6 chars
+                slug_path = f"{base_path}-{random_suffix}{extension}"
+                
+                # Check if this path already exists in database
+                check_stmt = select(File).where(File.link == slug_path)
+                path_exists = await session.exec(check_stmt)
+                if not path_exists.first() and not os.path.exists(slug_path):
+                    full_path = slug_path
+                    break
+            else:
+                # Fallback if all attempts failed (extremely unlikely)
+                import time
+                timestamp_suffix = str(int(time.time()))[-6:]
+                full_path = f"{base_path}-{timestamp_suffix}{extension}"
+
+        # save metadata
+        file_metadata = File(
+            name=filename,
+            link=full_path,
+            type=extension,
+            media_type=media_type,
+            hash=hash,
+            uploaded_by=uploaded_by,
+            chunks=[],
+        )
+        session.add(file_metadata)
+        await session.flush()
+        await session.refresh(file_metadata)
+        file_id = file_metadata.id
+
+        # Process and generate chunks and embeddings, then add them
+        sections = await _extract_text_and_chunk(staged_path, extension, filename)
+        await _ingest_sections(session, file, file_metadata.id, sections)
+        await session.commit()
+
+        # save file
+        _move_into_place(staged_path, full_path)
+
+        return {
+            "filename": filename,
+            "status": "success",
+            "file_id": file_id,
+        }
+
+    async def _ingest_sections(session, file: FileInfo, file_id, sections, known_vectors: Optional[dict] = None) -> int:
+        """
+        Embed and write sections while they are still being extracted.
+        A producer pulls sections from the (possibly lazy) iterable in a
+        thread and queues them in batches of about INGEST_BATCH_CHUNKS chunks,
+        at most INGEST_QUEUE_BATCHES ahead; each batch is embedded and written
+        before the next is taken. Memory stays bounded by the queue instead of
+        the document, and parsing overlaps with embedding. Everything goes into
+        the session's transaction; the caller commits once. The job status
+        follows each batch, embedding then inserting.
+        Returns the number of chunks written.
+        """
+        queue = asyncio.Queue(maxsize=Config.INGEST_QUEUE_BATCHES)
+        iterator = iter(sections)
+
+        async def produce():
+            batch, batch_chunks = [], 0
+            try:
+                while (section := await asyncio.to_thread(next, iterator, None)) is not None:
+                    batch.append(section)
+                    batch_chunks += len(section[1])
+                    if batch_chunks >= Config.INGEST_BATCH_CHUNKS:
+                        await queue.put(batch)
+                        batch, batch_chunks = [], 0
+                if batch:
+                    await queue.put(batch)
+                await queue.put(None)
+            except Exception as e:
+                # Raised again by the consumer
+                await queue.put(e)
+
+        producer = asyncio.create_task(produce())
+        section_ordinal = chunk_ordinal = 0
+        try:
+            while (batch := await queue.get()) is not None:
+                if isinstance(batch, Exception):
+                    raise batch
+                await _set_job_status(file, JOB_EMBEDDING)
+                chunks = [chunk for _, section_chunks in batch for chunk in section_chunks]
+                embeddings = await _embed_chunks(session, chunks, known_vectors)
+                if len(chunks) != len(embeddings):
+                    raise Exception(f"Mismatch between chunks and embeddings for {file['filename']}")
+                await _set_job_status(file, JOB_INSERTING)
+                await _write_sections(session, file_id, batch, embeddings, section_ordinal, chunk_ordinal)
+                section_ordinal += len(batch)
+                chunk_ordinal += len(chunks)
+        finally:
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
+
+        if chunk_ordinal == 0:
+            raise Exception(f"No valid chunks extracted from {file['filename']}")
+        return chunk_ordinal
+
+    async def _embed_chunks(session, chunks: List[str], known_vectors: Optional[dict] = None):
+        """
+        Embed chunks, only running the model on texts that are not already
+        in the embedding cache (or in known_vectors, keyed by content hash).
+        Newly computed and known vectors are written back to the cache.
+        """
+        model_name = embedding_provider.cache_key
+        hashes = [content_hash(chunk) for chunk in chunks]
+        vectors = dict(known_vectors or {})
+
+        lookup = set(hashes) - vectors.keys()
+        if lookup:
+            vectors.update(
+                await embedding_cache_service.get_many(model_name, lookup, session)
             )
-            session.add(file_metadata)
-            await session.flush()
-            await session.refresh(file_metadata)
-            file_id = file_metadata.id
-
-            # save file
-            os.makedirs(os.path.dirname(full_path), exist_ok=True)
-            async with aiofiles.open(full_path, "wb") as f:
-                await f.write(content)
-
-            # Process and generate chunks and embeddings
-            chunks = await _extract_text_and_chunk(full_path, extension, filename)
-            embeddings = vector_embedding_chunks(chunks)
-            
-            if len(chunks) != len(embeddings):
-                raise Exception(f"Mismatch between chunks and embeddings for {filename}")
-            
-            for chunk_content, embedding in zip(chunks, embeddings):
-                chunk = Chunk(
+
+        new_texts = {}
+        for hash, chunk in zip(hashes, chunks):
+            if hash not in vectors:
+                new_texts.setdefault(hash, chunk)
+        logger.info(
+            f"Embedding {len(new_texts)} of {len(chunks)} chunks "
+            f"({len(chunks) - len(new_texts)} served from cache)"
+        )
+
+        # Vectors carried over from old chunks are cached too, for later files
+        to_cache = {
+            hash: vectors[hash]
+            for hash in set(hashes) & (known_vectors or {}).keys()
+        }
+        if new_texts:
+            # In a thread, so the section producer keeps parsing meanwhile
+            new_vectors = await asyncio.to_thread(vector_embedding_chunks, list(new_texts.values()))
+            to_cache.update(zip(new_texts.keys(), new_vectors))
+            vectors.update(zip(new_texts.keys(), new_vectors))
+        if to_cache:
+            await embedding_cache_service.put_many(model_name, to_cache, session)
+
+        return np.stack([vectors[hash] for hash in hashes]).astype(np.float32, copy=False)
+
+    async def _write_sections(session, file_id, sections, embeddings, section_start=0, chunk_start=0):
+        """
+        Write Section rows and their Chunk rows (in document order) in the
+        session's transaction. Sections without text (Excel rows) only add chunks.
+        Ordinals continue from section_start / chunk_start for later batches.
+        Chunks go through the bulk writer; the caller commits once.
+        """
+        rows = []
+        for section_ordinal, (section_text, section_chunks) in enumerate(sections, start=section_start):
+            section_id = None
+            if section_text is not None:
+                section_id = uuid.uuid4()
+                session.add(Section(
+                    id=section_id,
+                    file_id=file_id,
+                    ordinal=section_ordinal,
+                    content=section_text,
+                ))
+            for chunk_content in section_chunks:
+                rows.append(ChunkRow(
                     content=chunk_content,
-                    vector=embedding.tolist(),
-                    file_id=file_metadata.id,
-                )
-                session.add(chunk)
-            await session.commit()
-
-            return {
-                "filename": filename,
-                "status": "success",
-                "file_id": file_id,
-            }
-
-        async def _extract_text_and_chunk(full_path: str, extension: str, filename: str):
-            """Extract text and generate chunks based on file type"""
-            # Automatically embed if .docx
-            if extension == ".docx":
-                text = read_docx_file(full_path)
-                chunks = chunk_text(text)
-            elif extension == ".pdf":
-                text = read_pdf_file(full_path)
-                chunks = chunk_text(text)
-            elif extension == ".txt":
-                text = read_txt_file(full_path)
-                chunks = chunk_text(text)
-            elif extension in [".xls", ".xlsx"]:
-                # logger.info(f"Processing Excel file: {filename}")
-                try:
-                    chunks = read_excel_file(full_path)
-                    # logger.info(f"Excel chunks extracted: {len(chunks) if chunks else 0} chunks")
-                    if not chunks:
-                        raise Exception(
-                            f"No valid chunks found in Excel file {filename}. The file may be empty or contain no readable data."
-                        )
-                except Exception as excel_error:
-                    # logger.error(f"Error processing Excel file {filename}: {str(excel_error)}")
+                    vector=embeddings[len(rows)],
+                    file_id=file_id,
+                    ordinal=chunk_start + len(rows),
+                    section_id=section_id,
+                ))
+        # The file and section rows must exist before COPY checks the foreign keys
+        await session.flush()
+        await chunk_writer.write(session, rows)
+
+    async def _extract_text_and_chunk(full_path: str, extension: str, filename: str):
+        """
+        Extract text and split it into sections based on file type.
+        Returns an iterable of (section_text, chunks); Excel rows are already
+        small, so they become chunks without a parent section (None).
+        PDFs are parsed lazily, page by page, while the sections are consumed.
+        """
+        # Automatically embed if .docx
+        if extension == ".docx":
+            text = read_docx_file(full_path)
+            sections = split_sections(text)
+        elif extension == ".pdf":
+            sections = iter_sections(iter_pdf_pages(full_path))
+        elif extension == ".txt":
+            text = read_txt_file(full_path)
+            sections = split_sections(text)
+        elif extension in [".xls", ".xlsx"]:
+            # logger.info(f"Processing Excel file: {filename}")
+            try:
+                chunks = read_excel_file(full_path)
+                # logger.info(f"Excel chunks extracted: {len(chunks) if chunks else 0} chunks")
+                if not chunks:
                     raise Exception(
-                        f"Failed to process Excel file {filename}: {str(excel_error)}"
+                        f"No valid chunks found in Excel file {filename}. The file may be empty or contain no readable data."
                     )
-            else:
-                raise Exception(f"Unsupported file type: {extension}")
+                # In pieces, so rows are embedded and written in bounded batches
+                sections = [
+                    (None, chunks[start:start + Config.INGEST_BATCH_CHUNKS])
+                    for start in range(0, len(chunks), Config.INGEST_BATCH_CHUNKS)
+                ]
+            except Exception as excel_error:
+                # logger.error(f"Error processing Excel file {filename}: {str(excel_error)}")
+                raise Exception(
+                    f"Failed to process Excel file {filename}: {str(excel_error)}"
+                )
+        else:
+            raise Exception(f"Unsupported file type: {extension}")
 
-            if not chunks:
-                raise Exception(f"No valid chunks extracted from {filename}")
-            
-            return chunks
+        return sections
 
-        tasks = [_process_file(file) for file in files]
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    tasks = [_process_file(file) for file in files]
+    results = await asyncio.gather(*tasks, return_exceptions=True)
 
-        await engine.dispose()  # Đóng engine sau khi hoàn tất
-        return results
+    try:
+        async with session_maker() as session:
+            evicted = await embedding_cache_service.evict_older_than(
+                timedelta(days=Config.EMBEDDING_CACHE_MAX_AGE_DAYS), session
+            )
+            if evicted:
+                logger.info(f"Evicted {evicted} stale embedding cache entries")
+    except Exception as e:
+        logger.error(f"Failed to evict embedding cache entries: {str(e)}")
 
-    return asyncio.run(_process())
+    return results
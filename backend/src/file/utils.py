@@ -1,7 +1,8 @@
 import json
 from docx import Document
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from src.shared.SentenceTransformer import model
+from src.shared.SentenceTransformer import embedding_provider
+from src.config import Config
 from PyPDF2 import PdfReader
 import pandas as pd
 import numpy as np
@@ -18,17 +19,15 @@ def read_docx_file(file_path):
     return "\n".join(fullText)
 
 
-def read_pdf_file(file_path):
+def iter_pdf_pages(file_path):
     """
-    Reads pdf file
+    Yields the text of each pdf page, so only one page is held at a time
     """
     doc = PdfReader(file_path)
-    fullText = []
     for page in doc.pages:
         page_text = page.extract_text()
         if page_text:
-            fullText.append(page_text)
-    return "\n".join(fullText)
+            yield page_text
 
 
 def read_excel_file(file_path, chunk_size=256, chunk_overlap=64):
@@ -104,14 +103,78 @@ def read_txt_file(file_path):
                 return file.read()
 
 
-def chunk_text(text):
-    split_text = RecursiveCharacterTextSplitter(chunk_size=256, chunk_overlap=64)
-    chunks = split_text.split_text(text)
-    return chunks
+def split_sections(text, section_size=None, chunk_size=256, chunk_overlap=None):
+    """
+    Splits text into parent sections of about section_size characters, and each
+    section into small overlapping child chunks for embedding.
+    Chunks never cross a section boundary.
+    Returns a list of (section_text, [chunk_text, ...]).
+    """
+    return list(iter_sections([text], section_size, chunk_size, chunk_overlap))
 
 
-def vector_embedding_chunks(chunks, max_length=1024):
-    embeddings = []
-    for chunk in chunks:
-        embeddings.append(np.array(model.encode(chunk)))
+def iter_sections(pieces, section_size=None, chunk_size=256, chunk_overlap=None):
+    """
+    split_sections over a stream of text pieces (e.g. pdf pages), yielding
+    (section_text, [chunk_text, ...]) as soon as a section is complete.
+    The last, possibly unfinished section of the buffer is carried into the
+    next piece, so sections and chunks run across page boundaries.
+    """
+    section_size = section_size or Config.SECTION_SIZE
+    chunk_overlap = Config.CHUNK_OVERLAP if chunk_overlap is None else chunk_overlap
+    section_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=section_size, chunk_overlap=0
+    )
+    chunk_splitter = RecursiveCharacterTextSplitter(
+        chunk_size=chunk_size, chunk_overlap=chunk_overlap
+    )
+
+    def split(text, keep_tail):
+        sections = section_splitter.split_text(text)
+        tail = sections.pop() if keep_tail and sections else ""
+        for section in sections:
+            chunks = chunk_splitter.split_text(section)
+            if chunks:
+                yield section, chunks
+        return tail
+
+    buffer = ""
+    for piece in pieces:
+        buffer = f"{buffer}\n{piece}" if buffer else piece
+        # Split only once the buffer holds more than one full section
+        if len(buffer) >= 2 * section_size:
+            buffer = yield from split(buffer, keep_tail=True)
+    if buffer:
+        yield from split(buffer, keep_tail=False)
+
+
+def vector_embedding_chunks(chunks, batch_size=None, sort_by_length=True):
+    """
+    Embeds chunks in batches and returns one contiguous float32 matrix
+    of shape (len(chunks), dim), rows in the same order as chunks.
+    With sort_by_length, chunks are encoded longest-first so every batch
+    holds texts of similar length and pads less.
+    """
+    batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+    embeddings = None
+    if not chunks:
+        return np.empty((0, 0), dtype=np.float32)
+
+    if sort_by_length:
+        order = np.argsort([-len(chunk) for chunk in chunks], kind="stable")
+    else:
+        order = np.arange(len(chunks))
+
+    for start in range(0, len(chunks), batch_size):
+        batch_idx = order[start:start + batch_size]
+        batch_embeddings = embedding_provider.encode(
+            [chunks[i] for i in batch_idx],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+        if embeddings is None:
+            # Size known after the first batch, so a remote model needs no extra call
+            embeddings = np.empty((len(chunks), batch_embeddings.shape[1]), dtype=np.float32)
+        embeddings[batch_idx] = batch_embeddings
     return embeddings
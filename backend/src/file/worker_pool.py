@@ -0,0 +1,135 @@
+"""
+Long-lived process pool for file ingestion.
+Each worker process loads the embedding model once (in the initializer),
+keeps one event loop and one database engine for its lifetime, and processes
+one file per task; files arrive as paths to staged uploads, never as bytes.
+An upload of N files is spread over min(N, INGEST_WORKERS) processes, so
+parsing and embedding do not share one GIL.
+
+Memory: every worker holds a full copy of the embedding model (unless the
+embedding sidecar is used), and each API process has its own pool, so the
+model is loaded INGEST_WORKERS x uvicorn workers times. Size INGEST_WORKERS
+for the RAM of the host, not for its core count.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Optional
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Result status of a file whose task was cancelled before a worker started it
+FILE_CANCELLED = "cancelled"
+
+# Per worker process state, set up by _init_worker
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_session_makers: dict = {}
+
+
+def _init_worker(torch_threads: int):
+    global _loop
+    try:
+        import torch
+
+        # Workers share the cores; do not let each one start a thread per core
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+
+    _loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_loop)
+
+    from src.shared.SentenceTransformer import embedding_provider
+
+    if Config.EMBEDDING_WARMUP:
+        embedding_provider.warm_up()
+    logger.info(f"Ingestion worker {os.getpid()} ready")
+
+
+def _session_maker(database_url: str):
+    if database_url not in _session_makers:
+        from sqlalchemy.ext.asyncio import AsyncEngine
+        from sqlalchemy.orm import sessionmaker
+        from sqlmodel import create_engine
+        from sqlmodel.ext.asyncio.session import AsyncSession
+
+        engine = AsyncEngine(create_engine(url=database_url))
+        _session_makers[database_url] = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+    return _session_makers[database_url]
+
+
+def _process_file(file: dict, uploaded_by, database_url: str) -> dict:
+    """Runs in a worker process: ingest one staged file"""
+    from src.file.service import process_files_async
+
+    (result,) = _loop.run_until_complete(
+        process_files_async([file], uploaded_by, _session_maker(database_url))
+    )
+    if isinstance(result, BaseException):
+        raise result
+    return result
+
+
+class IngestPool:
+    """Process pool shared by all uploads of this API process, started on first use"""
+
+    def __init__(self, max_workers: int = 2):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            torch_threads = max(1, (os.cpu_count() or 1) // self.max_workers)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                # Not fork: the API process already runs threads and an event loop
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(torch_threads,),
+            )
+        return self._executor
+
+    async def process_files(self, files: List[dict], uploaded_by, database_url: str) -> list:
+        """
+        Process files in parallel, one task per file; results in input order.
+        Files whose task was cancelled before it started (pool shutdown)
+        come back with status FILE_CANCELLED: nothing of them was written.
+        """
+        executor = self._get_executor()
+        futures = [
+            executor.submit(_process_file, file, uploaded_by, database_url)
+            for file in files
+        ]
+        results = await asyncio.gather(
+            *(asyncio.wrap_future(future) for future in futures), return_exceptions=True
+        )
+        if any(isinstance(result, BrokenProcessPool) for result in results):
+            # A worker died (e.g. out of memory); start fresh processes next time
+            logger.error("Ingestion pool is broken, restarting it")
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self._executor is executor:
+                self._executor = None
+        return [
+            {"filename": file["filename"], "status": FILE_CANCELLED}
+            if future.cancelled()
+            else {"filename": file["filename"], "status": "failed", "error": str(result)}
+            if isinstance(result, BaseException)
+            else result
+            for file, future, result in zip(files, futures, results)
+        ]
+
+    def shutdown(self):
+        """Cancel files not started yet and wait for the running ones to finish"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+ingest_pool = IngestPool(Config.INGEST_WORKERS)
@@ -0,0 +1,61 @@
+from sqlmodel import Column, Field, SQLModel, Index
+import sqlalchemy.dialects.postgresql as pg
+from datetime import datetime
+from typing import Optional
+import uuid
+
+# Job lifecycle: queued -> parsing -> embedding -> inserting -> done,
+# or back to queued (retry with backoff) and finally failed
+JOB_QUEUED = "queued"
+JOB_PARSING = "parsing"
+JOB_EMBEDDING = "embedding"
+JOB_INSERTING = "inserting"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+RUNNING_STATUSES = (JOB_PARSING, JOB_EMBEDDING, JOB_INSERTING)
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED)
+
+
+class IngestJob(SQLModel, table=True):
+    """
+    One uploaded file waiting for, or going through, ingestion.
+    The staged upload stays on disk until the job is done or has failed
+    for the last time, so a job interrupted by a restart can run again.
+    """
+    __tablename__ = "Ingest_job"
+    __table_args__ = (
+        Index("ix_Ingest_job_status_next_attempt_at", "status", "next_attempt_at"),
+    )
+
+    id: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
+    )
+    upload_id: uuid.UUID = Field(sa_column=Column(pg.UUID, nullable=False, index=True))
+    upload_index: int
+    uploaded_by: uuid.UUID = Field(foreign_key="Admin.id", nullable=False)
+    filename: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    full_path: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    staged_path: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    extension: str
+    media_type: str
+    hash: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
+    retrain_file_id: Optional[uuid.UUID] = Field(sa_column=Column(pg.UUID, nullable=True))
+    status: str = Field(
+        sa_column=Column(pg.VARCHAR, nullable=False, server_default=JOB_QUEUED)
+    )
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    error: Optional[str] = Field(default=None)
+    result_status: Optional[str] = Field(default=None)  # process_files_async status, e.g. "success"
+    file_id: Optional[uuid.UUID] = Field(sa_column=Column(pg.UUID, nullable=True))
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    updated_at: datetime = Field(
+        sa_column=Column(pg.TIMESTAMP, default=datetime.now, onupdate=datetime.now)
+    )
+    finished_at: Optional[datetime] = Field(sa_column=Column(pg.TIMESTAMP, nullable=True))
+    # Set on every job of the upload once its completion has been broadcast
+    notified_at: Optional[datetime] = Field(sa_column=Column(pg.TIMESTAMP, nullable=True))
+
+    def __repr__(self):
+        return f"<IngestJob {self.filename} ({self.status}, attempt {self.attempts}) of upload {self.upload_id}>"
@@ -0,0 +1,236 @@
+from sqlmodel import select, update
+from sqlalchemy.orm import aliased
+from sqlmodel.ext.asyncio.session import AsyncSession
+from datetime import datetime, timedelta
+from typing import List, Optional
+import logging
+import os
+import uuid
+
+from src.config import Config
+from .model import (
+    IngestJob,
+    JOB_QUEUED,
+    JOB_PARSING,
+    JOB_DONE,
+    JOB_FAILED,
+    RUNNING_STATUSES,
+    FINISHED_STATUSES,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class IngestJobService:
+    """
+    Service for the Postgres-backed ingestion queue.
+    Jobs are claimed with FOR UPDATE SKIP LOCKED, so any number of API
+    processes can run a worker loop against the same table.
+    """
+
+    def __init__(self, max_attempts: int, retry_delay: timedelta, lease: timedelta):
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.lease = lease
+
+    async def enqueue(self, files: List[dict], uploaded_by, upload_id, session: AsyncSession) -> List[IngestJob]:
+        """Queue one job per staged file of an upload"""
+        jobs = [
+            IngestJob(
+                upload_id=uuid.UUID(str(upload_id)),
+                upload_index=file["upload_index"],
+                uploaded_by=uuid.UUID(str(uploaded_by)),
+                filename=file["filename"],
+                full_path=file["full_path"],
+                staged_path=file["staged_path"],
+                extension=file["extension"],
+                media_type=file["media_type"],
+                hash=file["hash"],
+                retrain_file_id=uuid.UUID(file["retrain_file_id"]) if file.get("retrain_file_id") else None,
+                status=JOB_QUEUED,
+            )
+            for file in files
+        ]
+        session.add_all(jobs)
+        await session.commit()
+        return jobs
+
+    async def claim(self, limit: int, session: AsyncSession) -> List[IngestJob]:
+        """Take up to limit due jobs, oldest first, and mark them as parsing"""
+        statement = (
+            select(IngestJob)
+            .where(
+                IngestJob.status == JOB_QUEUED,
+                IngestJob.next_attempt_at <= datetime.now(),
+            )
+            .order_by(IngestJob.created_at, IngestJob.upload_index)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.exec(statement)
+        jobs = result.all()
+        for job in jobs:
+            job.status = JOB_PARSING
+            job.attempts += 1
+            job.error = None
+        await session.commit()
+        return jobs
+
+    async def set_status(self, job_id, status: str, session: AsyncSession):
+        """Move a running job to the next stage; also refreshes its lease"""
+        await session.exec(
+            update(IngestJob)
+            .where(IngestJob.id == uuid.UUID(str(job_id)))
+            .values(status=status, updated_at=datetime.now())
+        )
+        await session.commit()
+
+    async def heartbeat(self, job_ids: List[uuid.UUID], session: AsyncSession):
+        """Refresh the lease of jobs this process is still running"""
+        if not job_ids:
+            return
+        await session.exec(
+            update(IngestJob)
+            .where(IngestJob.id.in_(job_ids), IngestJob.status.in_(RUNNING_STATUSES))
+            .values(updated_at=datetime.now())
+        )
+        await session.commit()
+
+    async def finish(self, job_id, result: dict, session: AsyncSession) -> Optional[IngestJob]:
+        """
+        Record the result of one attempt. A failed attempt is queued again
+        with exponential backoff until max_attempts is reached.
+        """
+        job = await session.get(IngestJob, job_id, with_for_update=True)
+        if job is None:
+            return None
+
+        if result["status"] == "failed":
+            job.error = result.get("error")
+            if job.attempts >= self.max_attempts:
+                self._fail(job)
+            else:
+                job.status = JOB_QUEUED
+                job.next_attempt_at = datetime.now() + self.retry_delay * 2 ** (job.attempts - 1)
+                logger.warning(
+                    f"Ingest job {job.id} ({job.filename}) failed attempt {job.attempts}, "
+                    f"retrying at {job.next_attempt_at}: {job.error}"
+                )
+        else:
+            job.status = JOB_DONE
+            job.result_status = result["status"]
+            job.file_id = result.get("file_id")
+            job.finished_at = datetime.now()
+        await session.commit()
+        return job
+
+    async def release(self, job_ids: List[uuid.UUID], session: AsyncSession):
+        """Put jobs whose file was never started (pool shutdown) back in the queue without using up an attempt"""
+        if not job_ids:
+            return
+        await session.exec(
+            update(IngestJob)
+            .where(IngestJob.id.in_(job_ids), IngestJob.status.in_(RUNNING_STATUSES))
+            .values(
+                status=JOB_QUEUED,
+                attempts=IngestJob.attempts - 1,
+                next_attempt_at=datetime.now(),
+            )
+        )
+        await session.commit()
+
+    async def requeue_stale(self, session: AsyncSession) -> int:
+        """
+        Requeue running jobs whose lease ran out, i.e. whose process died.
+        Jobs that already used all their attempts are failed instead.
+        """
+        statement = (
+            select(IngestJob)
+            .where(
+                IngestJob.status.in_(RUNNING_STATUSES),
+                IngestJob.updated_at < datetime.now() - self.lease,
+            )
+            .with_for_update(skip_locked=True)
+        )
+        result = await session.exec(statement)
+        jobs = result.all()
+        for job in jobs:
+            job.error = f"Interrupted while {job.status}"
+            if job.attempts >= self.max_attempts:
+                self._fail(job)
+            else:
+                job.status = JOB_QUEUED
+                job.next_attempt_at = datetime.now()
+        await session.commit()
+        if jobs:
+            logger.info(f"Requeued {len(jobs)} interrupted ingest jobs")
+        return len(jobs)
+
+    async def claim_upload_notification(self, upload_id, session: AsyncSession) -> bool:
+        """
+        True for exactly one caller once every job of the upload has finished.
+        The conditional UPDATE locks the upload's rows: a concurrent caller
+        waits, then sees notified_at set and updates nothing.
+        """
+        upload_id = uuid.UUID(str(upload_id))
+        other = aliased(IngestJob)
+        unfinished = (
+            select(other.id)
+            .where(
+                other.upload_id == upload_id,
+                other.status.not_in(FINISHED_STATUSES),
+            )
+            .exists()
+        )
+        result = await session.exec(
+            update(IngestJob)
+            .where(
+                IngestJob.upload_id == upload_id,
+                IngestJob.notified_at.is_(None),
+                ~unfinished,
+            )
+            .values(notified_at=datetime.now())
+            .returning(IngestJob.id)
+        )
+        claimed = bool(result.all())
+        await session.commit()
+        return claimed
+
+    async def get_upload_jobs(self, upload_id, session: AsyncSession, uploaded_by=None) -> List[IngestJob]:
+        """Jobs of one upload in upload order, optionally only if uploaded_by owns them"""
+        statement = select(IngestJob).where(IngestJob.upload_id == uuid.UUID(str(upload_id)))
+        if uploaded_by is not None:
+            statement = statement.where(IngestJob.uploaded_by == uuid.UUID(str(uploaded_by)))
+        result = await session.exec(statement.order_by(IngestJob.upload_index))
+        return result.all()
+
+    @staticmethod
+    def to_file_info(job: IngestJob) -> dict:
+        """The FileInfo handed to the ingestion pool for a job"""
+        return {
+            "filename": job.filename,
+            "full_path": job.full_path,
+            "extension": job.extension,
+            "staged_path": job.staged_path,
+            "media_type": job.media_type,
+            "hash": job.hash,
+            "upload_index": job.upload_index,
+            "retrain_file_id": str(job.retrain_file_id) if job.retrain_file_id else None,
+            "job_id": str(job.id),
+        }
+
+    @staticmethod
+    def _fail(job: IngestJob):
+        job.status = JOB_FAILED
+        job.finished_at = datetime.now()
+        # No further attempt will need the staged upload
+        if os.path.exists(job.staged_path):
+            os.remove(job.staged_path)
+        logger.error(f"Ingest job {job.id} ({job.filename}) failed after {job.attempts} attempts: {job.error}")
+
+
+ingest_job_service = IngestJobService(
+    max_attempts=Config.INGEST_JOB_MAX_ATTEMPTS,
+    retry_delay=timedelta(seconds=Config.INGEST_JOB_RETRY_SECONDS),
+    lease=timedelta(seconds=Config.INGEST_JOB_LEASE_SECONDS),
+)
@@ -0,0 +1,130 @@
+"""
+Worker loop for the ingestion queue.
+Runs inside the API process, claims due jobs from the Ingest_job table as
+the ingestion pool has room for them, and records every result. Running
+jobs are kept alive by a heartbeat; jobs of a process that died are
+requeued by whichever worker notices their lease ran out (or at startup).
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+import uuid
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.file.worker_pool import IngestPool, FILE_CANCELLED
+from .model import IngestJob, FINISHED_STATUSES
+from .service import IngestJobService
+
+logger = logging.getLogger(__name__)
+
+
+class IngestWorker:
+    def __init__(
+        self,
+        pool: IngestPool,
+        job_service: IngestJobService,
+        engine: AsyncEngine,
+        database_url: str,
+        on_upload_finished: Optional[Callable[[List[IngestJob]], Awaitable[None]]] = None,
+        poll_seconds: float = 2.0,
+    ):
+        self.pool = pool
+        self.job_service = job_service
+        self.database_url = database_url
+        self.on_upload_finished = on_upload_finished
+        self.poll_seconds = poll_seconds
+        self._session_maker = sessionmaker(
+            bind=engine, class_=AsyncSession, expire_on_commit=False
+        )
+        self._running: Dict[uuid.UUID, asyncio.Task] = {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def notify(self):
+        """Look for new jobs now instead of at the next poll"""
+        self._wakeup.set()
+
+    async def stop(self):
+        """
+        Stop claiming, then shut the pool down: files already in a worker
+        process finish and their jobs are recorded as usual, files still
+        waiting are cancelled and their jobs released back to the queue.
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await asyncio.to_thread(self.pool.shutdown)
+        await asyncio.gather(*self._running.values(), return_exceptions=True)
+
+    async def _run(self):
+        async with self._session_maker() as session:
+            await self.job_service.requeue_stale(session)
+
+        heartbeat_seconds = Config.INGEST_JOB_LEASE_SECONDS / 4
+        next_heartbeat = time.monotonic() + heartbeat_seconds
+        while True:
+            jobs = []
+            try:
+                free = self.pool.max_workers - len(self._running)
+                if free > 0:
+                    async with self._session_maker() as session:
+                        jobs = await self.job_service.claim(free, session)
+                for job in jobs:
+                    self._running[job.id] = asyncio.create_task(self._run_job(job))
+
+                if time.monotonic() >= next_heartbeat:
+                    next_heartbeat = time.monotonic() + heartbeat_seconds
+                    async with self._session_maker() as session:
+                        await self.job_service.heartbeat(list(self._running), session)
+                        await self.job_service.requeue_stale(session)
+            except Exception as e:
+                logger.error(f"Ingest worker loop error: {str(e)}")
+
+            if not jobs:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def _run_job(self, job: IngestJob):
+        try:
+            logger.info(f"Ingest job {job.id}: {job.filename} (attempt {job.attempts})")
+            (result,) = await self.pool.process_files(
+                [self.job_service.to_file_info(job)], str(job.uploaded_by), self.database_url
+            )
+            if result["status"] == FILE_CANCELLED:
+                # Never started: requeue without using up the attempt
+                async with self._session_maker() as session:
+                    await self.job_service.release([job.id], session)
+                return
+            async with self._session_maker() as session:
+                finished = await self.job_service.finish(job.id, result, session)
+                if (
+                    finished is not None
+                    and finished.status in FINISHED_STATUSES
+                    and self.on_upload_finished is not None
+                    # Jobs of one upload may finish at once, in any process: notify once
+                    and await self.job_service.claim_upload_notification(finished.upload_id, session)
+                ):
+                    jobs = await self.job_service.get_upload_jobs(finished.upload_id, session)
+                    await self.on_upload_finished(jobs)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The job keeps its lease until it expires and is requeued
+            logger.error(f"Ingest job {job.id} could not be recorded: {str(e)}")
+        finally:
+            self._running.pop(job.id, None)
+            self._wakeup.set()
@@ -0,0 +1,45 @@
+from fastapi import APIRouter, Depends
+from src.auth.dependency import AccessTokenBearerAdmin
+from src.shared.SentenceTransformer import embedding_provider
+from src.shared.reranker import reranker
+from src.chat.utils import (
+    question_embedding_cache,
+    question_embedder,
+    retrieval_cache,
+    answer_cache_service,
+)
+from src.db.main import get_session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+monitoring_router = APIRouter()
+
+
+@monitoring_router.get("/embedding")
+async def embedding_stats(admin_detail: dict = Depends(AccessTokenBearerAdmin)):
+    """Report embedding model load time, memory and /ask batching for this worker."""
+    return {
+        "provider": embedding_provider.stats(),
+        "question_batcher": question_embedder.stats(),
+        "reranker": reranker.stats(),
+    }
+
+
+@monitoring_router.get("/caches")
+async def cache_stats(admin_detail: dict = Depends(AccessTokenBearerAdmin)):
+    """Report size and hit rate of the in-process caches of this worker."""
+    return {
+        "question_embedding": question_embedding_cache.stats(),
+        "retrieval": retrieval_cache.stats(),
+    }
+
+
+@monitoring_router.get("/answer-cache")
+async def answer_cache_stats(
+    admin_detail: dict = Depends(AccessTokenBearerAdmin),
+    session: AsyncSession = Depends(get_session),
+):
+    """Report answer cache hits and LLM tokens saved, for this worker and in total."""
+    return {
+        "worker": answer_cache_service.stats(),
+        "total": await answer_cache_service.totals(session),
+    }
@@ -0,0 +1,26 @@
+from sqlmodel import Column, Field, SQLModel, Index
+import sqlalchemy.dialects.postgresql as pg
+from datetime import datetime
+import uuid
+
+
+class Section(SQLModel, table=True):
+    """
+    Parent text of a run of child chunks. Chunks are small so vector matching
+    stays precise; the LLM is given the whole section a matching chunk came from.
+    """
+    __tablename__ = "Section"
+    __table_args__ = (
+        Index("ix_Section_file_id_ordinal", "file_id", "ordinal"),
+    )
+
+    id: uuid.UUID = Field(
+        sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
+    )
+    file_id: uuid.UUID = Field(foreign_key="File.id", nullable=False)
+    ordinal: int
+    content: str
+    created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+
+    def __repr__(self):
+        return f"<Section {self.ordinal} - file_id: {self.file_id}>"
@@ -1,5 +1,156 @@
-from sentence_transformers import SentenceTransformer
+import logging
+import os
+import threading
+import time
+from typing import Optional
 
-model = SentenceTransformer(
-    "sentence-transformers/paraphrase-multilingual-mpnet-base-v2"
+import numpy as np
+
+from src.config import Config
+from src.shared.embedding_backend import create_backend
+from src.shared.embedding_server import EmbeddingClient, EmbeddingServerError
+
+logger = logging.getLogger(__name__)
+
+
+def _current_rss_mb() -> Optional[float]:
+    """Resident memory of this process in MB (Linux only, None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            rss_pages = int(f.read().split()[1])
+        return rss_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class EmbeddingProvider:
+    """
+    Shared, lazily loaded sentence embedding model.
+    The model is loaded on first use (or by warm_up at startup), so
+    processes that never embed never pay for the weights.
+    When socket_path is set, encoding goes to the embedding sidecar; the
+    model is only loaded in this process if the sidecar fails and
+    socket_fallback is on, otherwise sidecar failures raise
+    EmbeddingServerError.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        backend: str,
+        load_budget_seconds: float,
+        socket_path: Optional[str] = None,
+        socket_fallback: bool = True,
+    ):
+        self.model_name = model_name
+        self.backend = backend
+        self.load_budget_seconds = load_budget_seconds
+        self.load_seconds: Optional[float] = None
+        self.load_rss_mb: Optional[float] = None
+        self._model = None
+        self._lock = threading.Lock()
+        self._client = EmbeddingClient(socket_path) if socket_path else None
+        self.socket_fallback = socket_fallback
+        self.remote_requests = 0
+        self.remote_failures = 0
+
+    @property
+    def loaded(self) -> bool:
+        return self._model is not None
+
+    @property
+    def cache_key(self) -> str:
+        """Identifies the vectors this provider produces, for persistent caches"""
+        if self.backend == "torch":
+            return self.model_name
+        suffix = "onnx-int8" if Config.EMBEDDING_ONNX_QUANTIZED else "onnx"
+        return f"{self.model_name}:{suffix}"
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self._load()
+        return self._model
+
+    def _load(self):
+        rss_before = _current_rss_mb()
+        start = time.perf_counter()
+
+        model = create_backend(
+            self.backend,
+            self.model_name,
+            onnx_dir=Config.EMBEDDING_ONNX_DIR,
+            onnx_quantized=Config.EMBEDDING_ONNX_QUANTIZED,
+            max_seq_length=Config.EMBEDDING_MAX_SEQ_LENGTH,
+        )
+
+        self.load_seconds = time.perf_counter() - start
+        rss_after = _current_rss_mb()
+        if rss_before is not None and rss_after is not None:
+            self.load_rss_mb = rss_after - rss_before
+
+        logger.info(
+            f"Loaded embedding model {self.model_name} ({model.name}) in {self.load_seconds:.2f}s "
+            f"(+{self.load_rss_mb or 0:.0f} MB RSS)"
+        )
+        if self.load_seconds > self.load_budget_seconds:
+            logger.warning(
+                f"Embedding model load took {self.load_seconds:.2f}s, "
+                f"over the {self.load_budget_seconds:.0f}s startup budget"
+            )
+        return model
+
+    def warm_up(self):
+        """Load the model and run one encode so the first request is not slow."""
+        self.encode(["warm up"])
+
+    def encode(self, texts, **kwargs):
+        embeddings = self._encode(texts, **kwargs)
+        if Config.EMBEDDING_NORMALIZE:
+            # Unit vectors: cosine similarity is then a plain inner product
+            embeddings = np.asarray(embeddings, dtype=np.float32)
+            if embeddings.size:
+                norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+                embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings
+
+    def _encode(self, texts, **kwargs):
+        if self._client is None:
+            return self.get().encode(texts, **kwargs)
+        try:
+            embeddings = self._client.encode(texts, **kwargs)
+        except (OSError, EmbeddingServerError) as e:
+            self.remote_failures += 1
+            if not self.socket_fallback:
+                if isinstance(e, EmbeddingServerError):
+                    raise
+                raise EmbeddingServerError(f"Embedding sidecar unavailable: {str(e)}") from e
+            logger.warning(f"Embedding sidecar failed, encoding in-process: {str(e)}")
+            return self.get().encode(texts, **kwargs)
+        self.remote_requests += 1
+        return embeddings
+
+    def stats(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "backend": self.backend,
+            "loaded": self.loaded,
+            "load_seconds": self.load_seconds,
+            "load_rss_mb": self.load_rss_mb,
+            "load_budget_seconds": self.load_budget_seconds,
+            "rss_mb": _current_rss_mb(),
+            "socket_path": self._client.socket_path if self._client else None,
+            "socket_fallback": self.socket_fallback,
+            "remote_requests": self.remote_requests,
+            "remote_failures": self.remote_failures,
+        }
+
+
+embedding_provider = EmbeddingProvider(
+    Config.EMBEDDING_MODEL_NAME,
+    Config.EMBEDDING_BACKEND,
+    Config.EMBEDDING_LOAD_BUDGET_SECONDS,
+    socket_path=Config.EMBEDDING_SOCKET_PATH,
+    socket_fallback=Config.EMBEDDING_SOCKET_FALLBACK,
 )
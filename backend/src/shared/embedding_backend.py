@@ -0,0 +1,195 @@
+"""
+Embedding backends.
+All backends expose the subset of the SentenceTransformer API used by the app
+(encode and get_sentence_embedding_dimension), so EmbeddingProvider callers
+do not care which one is configured through EMBEDDING_BACKEND.
+
+Export the ONNX model once before switching EMBEDDING_BACKEND to "onnx":
+    python -m src.shared.embedding_backend --quantize
+"""
+import argparse
+import logging
+import os
+from abc import ABC, abstractmethod
+from typing import List, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_QUANTIZED_MODEL_FILE = "model.int8.onnx"
+
+
+class EmbeddingBackend(ABC):
+    """Interface of an embedding backend"""
+
+    name = "base"
+
+    @abstractmethod
+    def encode(
+        self,
+        sentences: Union[str, List[str]],
+        batch_size: int = 32,
+        **kwargs,
+    ) -> np.ndarray:
+        """Return a float32 matrix (or a vector when given a single string)"""
+
+    @abstractmethod
+    def get_sentence_embedding_dimension(self) -> int:
+        """Size of the vectors encode returns"""
+
+
+class SentenceTransformerBackend(EmbeddingBackend):
+    """Reference PyTorch backend"""
+
+    name = "torch"
+
+    def __init__(self, model_name: str):
+        from sentence_transformers import SentenceTransformer
+
+        self.model = SentenceTransformer(model_name)
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        kwargs.setdefault("show_progress_bar", False)
+        return self.model.encode(sentences, batch_size=batch_size, **kwargs)
+
+    def get_sentence_embedding_dimension(self):
+        return self.model.get_sentence_embedding_dimension()
+
+
+class OnnxBackend(EmbeddingBackend):
+    """
+    ONNX Runtime backend for the exported transformer, optionally with
+    int8 dynamically quantized weights. Reproduces the mean pooling of
+    the sentence-transformers pipeline in NumPy.
+    """
+
+    def __init__(self, model_dir: str, quantized: bool = True, max_seq_length: int = 128):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "EMBEDDING_BACKEND=onnx requires the onnxruntime package"
+            ) from e
+        from transformers import AutoTokenizer
+
+        model_file = ONNX_QUANTIZED_MODEL_FILE if quantized else ONNX_MODEL_FILE
+        model_path = os.path.join(model_dir, model_file)
+        if not os.path.exists(model_path):
+            raise RuntimeError(
+                f"ONNX model not found at {model_path}, "
+                "export it with: python -m src.shared.embedding_backend"
+            )
+
+        self.name = "onnx-int8" if quantized else "onnx"
+        self.max_seq_length = max_seq_length
+        self.tokenizer = AutoTokenizer.from_pretrained(model_dir)
+        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self._dimension = self.session.get_outputs()[0].shape[-1]
+
+    def encode(self, sentences, batch_size=32, **kwargs):
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+
+        embeddings = np.empty((len(sentences), self._dimension), dtype=np.float32)
+        # Longest-first, like sentence-transformers, so batches pad less
+        order = np.argsort([-len(sentence) for sentence in sentences], kind="stable")
+        for start in range(0, len(sentences), batch_size):
+            batch_idx = order[start:start + batch_size]
+            tokens = self.tokenizer(
+                [sentences[i] for i in batch_idx],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors="np",
+            )
+            (token_embeddings,) = self.session.run(
+                None,
+                {
+                    "input_ids": tokens["input_ids"].astype(np.int64),
+                    "attention_mask": tokens["attention_mask"].astype(np.int64),
+                },
+            )
+            mask = tokens["attention_mask"][..., None].astype(np.float32)
+            summed = (token_embeddings * mask).sum(axis=1)
+            embeddings[batch_idx] = summed / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        return embeddings[0] if single else embeddings
+
+    def get_sentence_embedding_dimension(self):
+        return self._dimension
+
+
+def create_backend(
+    backend: str,
+    model_name: str,
+    onnx_dir: str,
+    onnx_quantized: bool,
+    max_seq_length: int,
+) -> EmbeddingBackend:
+    if backend == "torch":
+        return SentenceTransformerBackend(model_name)
+    if backend == "onnx":
+        return OnnxBackend(onnx_dir, quantized=onnx_quantized, max_seq_length=max_seq_length)
+    raise ValueError(f"Unknown embedding backend: {backend}")
+
+
+def export_onnx(model_name: str, output_dir: str, quantize: bool = True) -> str:
+    """Export the transformer of model_name to ONNX, optionally int8-quantized"""
+    import torch
+    from transformers import AutoModel, AutoTokenizer
+
+    class _LastHiddenState(torch.nn.Module):
+        def __init__(self, model):
+            super().__init__()
+            self.model = model
+
+        def forward(self, input_ids, attention_mask):
+            return self.model(input_ids=input_ids, attention_mask=attention_mask)[0]
+
+    os.makedirs(output_dir, exist_ok=True)
+    tokenizer = AutoTokenizer.from_pretrained(model_name)
+    tokenizer.save_pretrained(output_dir)
+    model = AutoModel.from_pretrained(model_name).eval()
+
+    sample = tokenizer(["export sample"], return_tensors="pt")
+    model_path = os.path.join(output_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            _LastHiddenState(model),
+            (sample["input_ids"], sample["attention_mask"]),
+            model_path,
+            input_names=["input_ids", "attention_mask"],
+            output_names=["last_hidden_state"],
+            dynamic_axes={
+                "input_ids": {0: "batch", 1: "sequence"},
+                "attention_mask": {0: "batch", 1: "sequence"},
+                "last_hidden_state": {0: "batch", 1: "sequence"},
+            },
+            opset_version=17,
+        )
+    logger.info(f"Exported {model_name} to {model_path}")
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantized_path = os.path.join(output_dir, ONNX_QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        logger.info(f"Quantized {model_path} to {quantized_path}")
+        return quantized_path
+    return model_path
+
+
+if __name__ == "__main__":
+    from src.config import Config
+
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX")
+    parser.add_argument("--model", default=Config.EMBEDDING_MODEL_NAME)
+    parser.add_argument("--output-dir", default=Config.EMBEDDING_ONNX_DIR)
+    parser.add_argument("--quantize", action="store_true", help="also write an int8 model")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(export_onnx(args.model, args.output_dir, quantize=args.quantize))
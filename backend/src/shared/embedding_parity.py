@@ -0,0 +1,131 @@
+"""
+Parity check between the reference PyTorch embedding model and the
+configured ONNX backend, run before switching EMBEDDING_BACKEND in production:
+
+    python -m src.shared.embedding_parity --sample 1000
+    python -m src.shared.embedding_parity --corpus passages.txt --fp32
+
+Reports cosine agreement between the two embeddings of every text,
+nearest-neighbour overlap (how often both backends retrieve the same
+top-k passages for a passage used as query) and the encoding speedup.
+Exits with status 1 when the mean cosine is below --min-cosine.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+from src.config import Config
+from src.shared.embedding_backend import OnnxBackend, SentenceTransformerBackend
+
+
+def load_corpus_from_db(sample: int) -> List[str]:
+    from sqlmodel import create_engine, text
+    from sqlalchemy.ext.asyncio import AsyncEngine
+
+    async def _load():
+        engine = AsyncEngine(create_engine(url=Config.DATABASE_URL))
+        async with engine.connect() as conn:
+            result = await conn.execute(
+                text('SELECT content FROM "Chunk" ORDER BY random() LIMIT :n'),
+                {"n": sample},
+            )
+            rows = [row.content for row in result]
+        await engine.dispose()
+        return rows
+
+    return asyncio.run(_load())
+
+
+def load_corpus_from_file(path: str, sample: int) -> List[str]:
+    with open(path, encoding="utf-8") as f:
+        lines = [line.strip() for line in f if line.strip()]
+    return lines[:sample]
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    return matrix / np.clip(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12, None)
+
+
+def _timed_encode(backend, texts: List[str], batch_size: int):
+    start = time.perf_counter()
+    embeddings = backend.encode(texts, batch_size=batch_size)
+    return np.asarray(embeddings, dtype=np.float32), time.perf_counter() - start
+
+
+def compare(reference: np.ndarray, candidate: np.ndarray, k: int) -> dict:
+    reference, candidate = _normalize(reference), _normalize(candidate)
+    cosine = (reference * candidate).sum(axis=1)
+
+    k = min(k, len(reference) - 1)
+    overlap = None
+    if k > 0:
+        # Each passage queries the corpus; compare top-k neighbours (self excluded)
+        ref_scores, cand_scores = reference @ reference.T, candidate @ candidate.T
+        np.fill_diagonal(ref_scores, -np.inf)
+        np.fill_diagonal(cand_scores, -np.inf)
+        ref_top = np.argpartition(-ref_scores, k, axis=1)[:, :k]
+        cand_top = np.argpartition(-cand_scores, k, axis=1)[:, :k]
+        overlap = float(np.mean([
+            len(set(r) & set(c)) / k for r, c in zip(ref_top, cand_top)
+        ]))
+
+    return {
+        "mean_cosine": float(cosine.mean()),
+        "min_cosine": float(cosine.min()),
+        "p5_cosine": float(np.percentile(cosine, 5)),
+        f"top{k}_overlap": overlap,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare ONNX embeddings with the reference model")
+    parser.add_argument("--corpus", help="text file with one passage per line (default: sample Chunk rows)")
+    parser.add_argument("--sample", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch-size", type=int, default=Config.EMBEDDING_BATCH_SIZE)
+    parser.add_argument("--fp32", action="store_true", help="check the non-quantized ONNX model")
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    args = parser.parse_args()
+
+    if args.corpus:
+        texts = load_corpus_from_file(args.corpus, args.sample)
+    else:
+        texts = load_corpus_from_db(args.sample)
+    if len(texts) < 2:
+        sys.exit("Need at least two passages to compare")
+
+    reference = SentenceTransformerBackend(Config.EMBEDDING_MODEL_NAME)
+    candidate = OnnxBackend(
+        Config.EMBEDDING_ONNX_DIR,
+        quantized=not args.fp32,
+        max_seq_length=Config.EMBEDDING_MAX_SEQ_LENGTH,
+    )
+    # Warm both up so one-off initialisation is not timed
+    reference.encode(texts[:2])
+    candidate.encode(texts[:2])
+
+    ref_embeddings, ref_seconds = _timed_encode(reference, texts, args.batch_size)
+    cand_embeddings, cand_seconds = _timed_encode(candidate, texts, args.batch_size)
+
+    report = compare(ref_embeddings, cand_embeddings, args.k)
+    report.update({
+        "passages": len(texts),
+        "backend": candidate.name,
+        "reference_seconds": ref_seconds,
+        "candidate_seconds": cand_seconds,
+        "speedup": ref_seconds / cand_seconds if cand_seconds else None,
+    })
+    for key, value in report.items():
+        print(f"{key:>20}: {value}")
+
+    if report["mean_cosine"] < args.min_cosine:
+        print(f"Mean cosine {report['mean_cosine']:.4f} is below {args.min_cosine}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Standalone embedding sidecar.
+One process holds the model and serves every API and ingestion worker on the
+host over a Unix socket, so workers can be scaled by CPU count without one
+copy of the weights each. Requests from all connections are coalesced into
+batched encode calls.
+
+    python -m src.shared.embedding_server --socket /run/aitchatbot/embedding.sock
+
+Workers use it when EMBEDDING_SOCKET_PATH points at the socket. They then
+never load the model themselves; requests fail while the sidecar is down.
+
+Wire format: every message is a 4-byte big-endian length followed by a JSON
+header. A response to {"texts": [...]} is the header {"rows": n, "dim": d}
+followed by n * d float32 values (little-endian, row-major).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import socket
+import struct
+import threading
+from typing import List, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+_LENGTH = struct.Struct(">I")
+MAX_FRAME_BYTES = 64 * 1024 * 1024
+# encode kwargs that cannot change the vectors: the sidecar batches on its own
+# and always returns float32 NumPy arrays
+IGNORED_ENCODE_KWARGS = {"batch_size", "show_progress_bar", "convert_to_numpy"}
+
+
+class EmbeddingServerError(Exception):
+    """The sidecar answered with an error"""
+
+
+def _frame(header: dict) -> bytes:
+    body = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    return _LENGTH.pack(len(body)) + body
+
+
+# ---------------------------------------------------------------- client
+
+
+class EmbeddingClient:
+    """
+    Blocking client for the embedding sidecar.
+    Keeps one connection per thread and reuses it between calls.
+    """
+
+    def __init__(self, socket_path: str, timeout: float = 60.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connection(self) -> socket.socket:
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self._local.sock = None
+
+    @staticmethod
+    def _recv_exact(sock: socket.socket, size: int) -> bytes:
+        buffer = bytearray(size)
+        view = memoryview(buffer)
+        received = 0
+        while received < size:
+            n = sock.recv_into(view[received:])
+            if n == 0:
+                raise ConnectionError("Embedding sidecar closed the connection")
+            received += n
+        return bytes(buffer)
+
+    def _request(self, header: dict):
+        # A pooled connection may have been closed by a sidecar restart: retry once
+        for attempt in range(2):
+            sock = self._connection()
+            try:
+                sock.sendall(_frame(header))
+                (length,) = _LENGTH.unpack(self._recv_exact(sock, _LENGTH.size))
+                response = json.loads(self._recv_exact(sock, length))
+                if "error" in response:
+                    raise EmbeddingServerError(response["error"])
+                payload = b""
+                if "rows" in response:
+                    payload = self._recv_exact(sock, response["rows"] * response["dim"] * 4)
+                return response, payload
+            except (OSError, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+    def encode(self, texts: Union[str, List[str]], normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        """
+        Same result as the local model's encode for the kwargs it accepts;
+        any kwarg that would change the vectors and is not supported is rejected
+        """
+        unsupported = set(kwargs) - IGNORED_ENCODE_KWARGS
+        if unsupported:
+            raise TypeError(f"Not supported by the embedding sidecar: {', '.join(sorted(unsupported))}")
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        response, payload = self._request({"texts": texts})
+        embeddings = np.frombuffer(payload, dtype="<f4").reshape(
+            response["rows"], response["dim"]
+        )
+        if normalize_embeddings:
+            embeddings = embeddings / np.clip(
+                np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None
+            )
+        return embeddings[0] if single else embeddings
+
+    def stats(self) -> dict:
+        response, _ = self._request({"op": "stats"})
+        return response
+
+
+# ---------------------------------------------------------------- server
+
+
+async def _handle_connection(reader, writer, batcher, provider):
+    try:
+        while True:
+            try:
+                (length,) = _LENGTH.unpack(await reader.readexactly(_LENGTH.size))
+            except asyncio.IncompleteReadError:
+                break
+            if length > MAX_FRAME_BYTES:
+                writer.write(_frame({"error": "request too large"}))
+                await writer.drain()
+                break
+
+            request = json.loads(await reader.readexactly(length))
+            if request.get("op") == "stats":
+                writer.write(_frame({
+                    "provider": provider.stats(),
+                    "batcher": batcher.stats(),
+                }))
+            else:
+                try:
+                    vectors = await asyncio.gather(
+                        *(batcher.embed(text) for text in request["texts"])
+                    )
+                    matrix = np.asarray(vectors, dtype="<f4").reshape(len(vectors), -1)
+                    writer.write(_frame({"rows": matrix.shape[0], "dim": matrix.shape[1]}))
+                    writer.write(matrix.tobytes())
+                except Exception as e:
+                    logger.error(f"Embedding request failed: {str(e)}")
+                    writer.write(_frame({"error": str(e)}))
+            await writer.drain()
+    finally:
+        writer.close()
+
+
+async def serve(socket_path: str):
+    from src.config import Config
+    from src.shared.SentenceTransformer import embedding_provider
+    from src.shared.embedding_batcher import EmbeddingBatcher
+
+    # Always the in-process model here, never the sidecar itself
+    model = embedding_provider.get()
+    model.encode(["warm up"])
+    batcher = EmbeddingBatcher(
+        lambda texts: model.encode(texts, batch_size=len(texts)),
+        max_batch_size=Config.EMBEDDING_BATCH_SIZE,
+        max_wait_ms=Config.EMBEDDING_BATCH_MAX_WAIT_MS,
+    )
+
+    if os.path.exists(socket_path):
+        os.unlink(socket_path)
+    os.makedirs(os.path.dirname(os.path.abspath(socket_path)), exist_ok=True)
+    server = await asyncio.start_unix_server(
+        lambda reader, writer: _handle_connection(reader, writer, batcher, embedding_provider),
+        path=socket_path,
+    )
+    os.chmod(socket_path, 0o660)
+    logger.info(f"Embedding sidecar listening on {socket_path}")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+
+if __name__ == "__main__":
+    from src.config import Config
+
+    parser = argparse.ArgumentParser(description="Serve embeddings over a Unix socket")
+    parser.add_argument("--socket", default=Config.EMBEDDING_SOCKET_PATH or "/tmp/aitchatbot-embedding.sock")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(serve(args.socket))
@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Sequence, Tuple
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+class Reranker:
+    """
+    Lazily loaded cross-encoder that rescores (question, chunk) pairs in one
+    batched call and keeps the top_k chunks.
+    Scoring has a hard latency budget: when it is exceeded the chunks are
+    returned in vector order instead. A timed-out call cannot be interrupted,
+    so scoring runs on a single worker thread and later calls queue behind it
+    (queue time counts against their budget too).
+    """
+
+    def __init__(self, model_name: str, top_k: int, budget_ms: float):
+        self.model_name = model_name
+        self.top_k = top_k
+        self.budget_ms = budget_ms
+        self._model = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rerank")
+
+        self.calls = 0
+        self.timeouts = 0
+        self.failures = 0
+        self.scored = 0
+        self.score_seconds = 0.0
+
+    def get(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    start = time.perf_counter()
+                    self._model = CrossEncoder(self.model_name)
+                    logger.info(
+                        f"Loaded rerank model {self.model_name} in {time.perf_counter() - start:.2f}s"
+                    )
+        return self._model
+
+    def warm_up(self):
+        """Load the model and score one pair so the first request is not slow."""
+        self.get().predict([("warm up", "warm up")])
+
+    def _score(self, question: str, texts: List[str]) -> List[float]:
+        start = time.perf_counter()
+        scores = self.get().predict(
+            [(question, text) for text in texts],
+            batch_size=len(texts),
+            show_progress_bar=False,
+        )
+        self.score_seconds += time.perf_counter() - start
+        self.scored += 1
+        return [float(score) for score in scores]
+
+    async def rerank(self, question: str, hits: Sequence) -> Tuple[list, str]:
+        """
+        Return the top_k hits (anything with a .content) and how they were
+        ordered: "reranked", "skipped" (no more than top_k hits), "timeout"
+        or "failed" (the last two keep vector order)
+        """
+        hits = list(hits)
+        if len(hits) <= self.top_k:
+            return hits, "skipped"
+
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        try:
+            scores = await asyncio.wait_for(
+                loop.run_in_executor(
+                    self._executor, self._score, question, [hit.content for hit in hits]
+                ),
+                timeout=self.budget_ms / 1000,
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning(f"Rerank exceeded its {self.budget_ms:.0f} ms budget, using vector order")
+            return hits[:self.top_k], "timeout"
+        except Exception as e:
+            self.failures += 1
+            logger.error(f"Rerank failed, using vector order: {str(e)}")
+            return hits[:self.top_k], "failed"
+
+        order = sorted(range(len(hits)), key=lambda i: scores[i], reverse=True)
+        return [hits[i] for i in order[:self.top_k]], "reranked"
+
+    def stats(self) -> dict:
+        return {
+            "model_name": self.model_name,
+            "enabled": Config.RERANK_ENABLED,
+            "loaded": self._model is not None,
+            "top_k": self.top_k,
+            "budget_ms": self.budget_ms,
+            "calls": self.calls,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            # Includes calls that finished after their budget ran out
+            "avg_score_ms": self.score_seconds / self.scored * 1000 if self.scored else None,
+        }
+
+
+reranker = Reranker(Config.RERANK_MODEL_NAME, Config.RERANK_TOP_K, Config.RERANK_BUDGET_MS)